@@ -0,0 +1,29 @@
+"""Composite (user_id, date) index on meal_plans
+
+Revision ID: 002
+Revises: 001
+Create Date: 2025-08-29 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The dominant query is "this user's plans in a date range"; a composite
+    # index serves it directly and also covers user-only lookups via its
+    # leading column, so the standalone user_id index is redundant.
+    op.create_index('ix_meal_plans_user_date', 'meal_plans', ['user_id', 'date'])
+    op.drop_index(op.f('ix_meal_plans_user_id'), table_name='meal_plans')
+    # ix_meal_plans_date is kept: the lock check queries by date alone.
+
+
+def downgrade():
+    op.create_index(op.f('ix_meal_plans_user_id'), 'meal_plans', ['user_id'], unique=False)
+    op.drop_index('ix_meal_plans_user_date', table_name='meal_plans')
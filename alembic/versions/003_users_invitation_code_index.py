@@ -0,0 +1,33 @@
+"""Partial index on users.invitation_code
+
+Revision ID: 003
+Revises: 002
+Create Date: 2025-08-29 10:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Invite-code redemption looks up users by invitation_code on every
+    # signup; without an index that's a sequential scan. Only active users
+    # matter for redemption, so a partial index keeps the btree small.
+    # Codes are multi-use (every family member registers with the same
+    # shared code), so the index must not be unique.
+    op.create_index(
+        'ix_users_active_invite',
+        'users',
+        ['invitation_code'],
+        postgresql_where=sa.text('is_active'),
+    )
+
+
+def downgrade():
+    op.drop_index('ix_users_active_invite', table_name='users')
@@ -0,0 +1,50 @@
+"""Convert recipe JSON columns to JSONB with GIN protein index
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-08-29 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '004'
+down_revision = '003'
+branch_labels = None
+depends_on = None
+
+JSONB_COLUMNS = ('ingredients', 'ingredients_original', 'main_protein', 'macro_nutrients')
+
+
+def upgrade():
+    # JSON stores raw text and re-parses on every read; JSONB parses once at
+    # write time and supports GIN containment indexes.
+    for column in JSONB_COLUMNS:
+        op.alter_column(
+            'recipes',
+            column,
+            type_=postgresql.JSONB(astext_type=sa.Text()),
+            postgresql_using=f'{column}::jsonb',
+        )
+
+    # Backs protein filters (main_protein @> '["chicken"]') with an index
+    # instead of a full table scan.
+    op.create_index(
+        'ix_recipes_main_protein_gin',
+        'recipes',
+        ['main_protein'],
+        postgresql_using='gin',
+    )
+
+
+def downgrade():
+    op.drop_index('ix_recipes_main_protein_gin', table_name='recipes')
+    for column in JSONB_COLUMNS:
+        op.alter_column(
+            'recipes',
+            column,
+            type_=sa.JSON(),
+            postgresql_using=f'{column}::json',
+        )
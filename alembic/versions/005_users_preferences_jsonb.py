@@ -0,0 +1,36 @@
+"""Convert users.dietary_preferences to JSONB
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-08-29 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Preferences are read on every tool turn; JSONB skips the text re-parse
+    # and keeps the door open for server-side preference filtering.
+    op.alter_column(
+        'users',
+        'dietary_preferences',
+        type_=postgresql.JSONB(astext_type=sa.Text()),
+        postgresql_using='dietary_preferences::jsonb',
+    )
+
+
+def downgrade():
+    op.alter_column(
+        'users',
+        'dietary_preferences',
+        type_=sa.JSON(),
+        postgresql_using='dietary_preferences::json',
+    )
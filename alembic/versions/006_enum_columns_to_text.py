@@ -0,0 +1,60 @@
+"""Replace native enum columns with VARCHAR + CHECK
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-08-29 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+# (table, column, old type name, allowed member names, check name)
+ENUM_COLUMNS = (
+    ('users', 'role', 'userrole',
+     ('FAMILY_MEMBER', 'CHEF'), 'ck_users_role'),
+    ('meal_plans', 'meal_type', 'mealtype',
+     ('BREAKFAST', 'LUNCH', 'DINNER', 'SNACK'), 'ck_meal_plans_meal_type'),
+    ('meal_plans', 'status', 'mealplanstatus',
+     ('UNLOCKED', 'LOCKED'), 'ck_meal_plans_status'),
+)
+
+
+def upgrade():
+    # Native enums cost an oid->label relcache lookup per row and take an
+    # exclusive ALTER TYPE lock to grow; VARCHAR + CHECK stores the same
+    # bytes without either.
+    for table, column, type_name, values, check_name in ENUM_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.String(16),
+            postgresql_using=f'{column}::text',
+        )
+        quoted = ", ".join(f"'{value}'" for value in values)
+        op.create_check_constraint(check_name, table, f"{column} IN ({quoted})")
+
+    for type_name in ('userrole', 'mealtype', 'mealplanstatus'):
+        op.execute(f'DROP TYPE {type_name}')
+
+
+def downgrade():
+    for table, column, type_name, values, check_name in ENUM_COLUMNS:
+        op.drop_constraint(check_name, table)
+
+    op.execute("CREATE TYPE userrole AS ENUM ('FAMILY_MEMBER', 'CHEF')")
+    op.execute("CREATE TYPE mealtype AS ENUM ('BREAKFAST', 'LUNCH', 'DINNER', 'SNACK')")
+    op.execute("CREATE TYPE mealplanstatus AS ENUM ('UNLOCKED', 'LOCKED')")
+
+    for table, column, type_name, values, check_name in ENUM_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.Enum(*values, name=type_name),
+            postgresql_using=f'{column}::{type_name}',
+        )
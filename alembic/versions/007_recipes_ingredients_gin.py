@@ -0,0 +1,26 @@
+"""Enable pg_trgm for recipe text search
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-08-29 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Backs the trigram indexes behind the ILIKE search paths (added in
+    # 014). The dietary filters themselves are NOT LIKE predicates,
+    # which no index can serve — negated LIKE always scans — so no
+    # index is created for them here.
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+
+def downgrade():
+    op.execute("DROP EXTENSION IF EXISTS pg_trgm")
@@ -0,0 +1,58 @@
+"""Precomputed suitable_meal_types column on recipes
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-08-29 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'recipes',
+        sa.Column(
+            'suitable_meal_types',
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+            server_default='[]',
+        ),
+    )
+    # Backfill with the same heuristics classify_meal_types applies at
+    # ingest, so existing rows are immediately usable for planning
+    op.execute(
+        """
+        UPDATE recipes SET suitable_meal_types = (
+            SELECT coalesce(jsonb_agg(mt), '[]'::jsonb) FROM (
+                SELECT 'breakfast' AS mt
+                 WHERE lower(recipes.recipe_name)
+                       ~ '(egg|oatmeal|pancake|waffle|cereal|toast|smoothie|yogurt)'
+                    OR recipes.calories_per_serving < 600
+                UNION ALL
+                SELECT 'lunch' WHERE recipes.calories_per_serving BETWEEN 400 AND 800
+                UNION ALL
+                SELECT 'dinner' WHERE recipes.calories_per_serving BETWEEN 500 AND 900
+                UNION ALL
+                SELECT 'snack' WHERE recipes.calories_per_serving < 300
+            ) s
+        )
+        """
+    )
+    # Containment (@>) filtering per meal type stays indexed
+    op.execute(
+        "CREATE INDEX recipes_suitable_meal_types_gin ON recipes "
+        "USING gin (suitable_meal_types jsonb_path_ops)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX recipes_suitable_meal_types_gin")
+    op.drop_column('recipes', 'suitable_meal_types')
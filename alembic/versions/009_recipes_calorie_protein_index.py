@@ -0,0 +1,28 @@
+"""Composite calorie/protein index for recipe search
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-08-29 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # search_recipes filters on a calorie band plus a protein floor
+    # extracted from the macro_nutrients JSONB; indexing both lets the
+    # randomized candidate pick scan the index instead of the heap.
+    op.execute(
+        "CREATE INDEX ix_recipes_calories_protein ON recipes "
+        "(calories_per_serving, ((macro_nutrients->>'protein_g')::int))"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX ix_recipes_calories_protein")
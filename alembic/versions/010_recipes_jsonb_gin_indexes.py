@@ -0,0 +1,30 @@
+"""GIN index on the recipe macro JSONB column
+
+Revision ID: 010
+Revises: 009
+Create Date: 2025-08-29 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # macro_nutrients containment compiles to @>, which a jsonb_path_ops
+    # GIN index answers without a sequential scan. main_protein needs no
+    # new index — 004's ix_recipes_main_protein_gin already serves its
+    # @> filters — and the dedup lookup is covered by the composite
+    # B-tree behind the uq_recipe_identity unique constraint.
+    op.execute(
+        "CREATE INDEX ix_recipe_macros_gin ON recipes "
+        "USING gin (macro_nutrients jsonb_path_ops)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX ix_recipe_macros_gin")
@@ -0,0 +1,51 @@
+"""Stored generated columns for numeric macro values
+
+Revision ID: 011
+Revises: 010
+Create Date: 2025-08-29 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+_COLUMNS = (
+    ('protein_g_num', 'protein_g'),
+    ('fat_g_num', 'fat_g'),
+    ('carbs_g_num', 'carbohydrates_g'),
+)
+
+
+def upgrade():
+    # Range filters on macro_nutrients cast per row and can't use an
+    # index; stored generated columns pay the extraction once on write.
+    for column, key in _COLUMNS:
+        op.execute(
+            f"ALTER TABLE recipes ADD COLUMN {column} double precision "
+            f"GENERATED ALWAYS AS ((macro_nutrients->>'{key}')::double precision) STORED"
+        )
+    op.execute("CREATE INDEX ix_recipes_protein_g_num ON recipes (protein_g_num)")
+    op.execute("CREATE INDEX ix_recipes_fat_g_num ON recipes (fat_g_num)")
+    # Re-point the composite calorie/protein index (009) at the
+    # generated column so it matches the rewritten predicates
+    op.execute("DROP INDEX ix_recipes_calories_protein")
+    op.execute(
+        "CREATE INDEX ix_recipes_calories_protein ON recipes "
+        "(calories_per_serving, protein_g_num)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX ix_recipes_calories_protein")
+    op.execute(
+        "CREATE INDEX ix_recipes_calories_protein ON recipes "
+        "(calories_per_serving, ((macro_nutrients->>'protein_g')::int))"
+    )
+    op.execute("DROP INDEX ix_recipes_fat_g_num")
+    op.execute("DROP INDEX ix_recipes_protein_g_num")
+    for column, _ in reversed(_COLUMNS):
+        op.execute(f"ALTER TABLE recipes DROP COLUMN {column}")
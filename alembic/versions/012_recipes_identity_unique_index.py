@@ -0,0 +1,31 @@
+"""NULL-proof unique identity index for recipes
+
+Revision ID: 012
+Revises: 011
+Create Date: 2025-08-29 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # uq_recipe_identity treats NULL book/author as distinct, so two
+    # ingests of the same bookless recipe both pass. The COALESCE form
+    # closes that hole and is the arbiter index for the ON CONFLICT
+    # DO NOTHING insert in ingest_single_recipe.
+    op.execute(
+        """
+        CREATE UNIQUE INDEX uq_recipes_identity_coalesced
+        ON recipes (recipe_name, COALESCE(recipe_book, ''), COALESCE(recipe_author, ''))
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_recipes_identity_coalesced', table_name='recipes')
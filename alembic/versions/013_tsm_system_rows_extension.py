@@ -0,0 +1,24 @@
+"""Enable tsm_system_rows for random recipe sampling
+
+Revision ID: 013
+Revises: 012
+Create Date: 2025-08-29 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Backs TABLESAMPLE SYSTEM_ROWS(n) in the unfiltered randomized
+    # recipe search; ships with contrib alongside pg_trgm
+    op.execute("CREATE EXTENSION IF NOT EXISTS tsm_system_rows")
+
+
+def downgrade() -> None:
+    op.execute("DROP EXTENSION IF EXISTS tsm_system_rows")
@@ -0,0 +1,38 @@
+"""Trigram indexes for recipe name and ingredients ILIKE search
+
+Revision ID: 014
+Revises: 013
+Create Date: 2025-08-29 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '014'
+down_revision = '013'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Leading-wildcard ILIKE can never use a btree; pg_trgm GIN indexes
+    # (extension created in 007) answer both predicates the search paths
+    # actually issue: recipe_name ILIKE and the repository's
+    # ingredients::text ILIKE as written.
+    op.execute(
+        """
+        CREATE INDEX ix_recipe_name_trgm
+        ON recipes USING gin (recipe_name gin_trgm_ops)
+        """
+    )
+    op.execute(
+        """
+        CREATE INDEX ix_recipe_ing_trgm
+        ON recipes USING gin ((ingredients::text) gin_trgm_ops)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recipe_ing_trgm', table_name='recipes')
+    op.drop_index('ix_recipe_name_trgm', table_name='recipes')
@@ -0,0 +1,42 @@
+"""Unique constraint on meal_plans (user_id, date, meal_type)
+
+Revision ID: 015
+Revises: 014
+Create Date: 2025-08-29 12:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '015'
+down_revision = '014'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The model declares uq_user_date_meal and the meal-plan update
+    # upsert names it as its ON CONFLICT arbiter, but 001 never created
+    # it — outside development (where create_all runs) the upsert fails
+    # with "constraint does not exist". Dedupe any rows that slipped in
+    # without it (keep the most recently updated plan per slot), then
+    # add the constraint.
+    op.execute(
+        """
+        DELETE FROM meal_plans
+        WHERE id NOT IN (
+            SELECT DISTINCT ON (user_id, date, meal_type) id
+            FROM meal_plans
+            ORDER BY user_id, date, meal_type, updated_at DESC
+        )
+        """
+    )
+    op.create_unique_constraint(
+        'uq_user_date_meal',
+        'meal_plans',
+        ['user_id', 'date', 'meal_type'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_user_date_meal', 'meal_plans', type_='unique')
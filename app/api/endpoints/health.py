@@ -1,8 +1,23 @@
-from fastapi import APIRouter
+import hashlib
+
+from fastapi import APIRouter, Request, Response
+
+import orjson
 
 router = APIRouter()
 
+# Probes hit this endpoint every few seconds per replica; serialize once.
+_HEALTH_BODY = orjson.dumps({"status": "healthy", "service": "ChefLink API"})
+_HEALTH_ETAG = f'"{hashlib.md5(_HEALTH_BODY).hexdigest()}"'
+
 
 @router.get("/")
-async def health_check():
-    return {"status": "healthy", "service": "ChefLink API"}
\ No newline at end of file
+async def health_check(request: Request):
+    # Revalidating probes get an empty 304 instead of the body
+    if request.headers.get("if-none-match") == _HEALTH_ETAG:
+        return Response(status_code=304, headers={"ETag": _HEALTH_ETAG})
+    return Response(
+        content=_HEALTH_BODY,
+        media_type="application/json",
+        headers={"ETag": _HEALTH_ETAG},
+    )
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Literal
 
 from pydantic import PostgresDsn, field_validator
@@ -15,10 +16,19 @@ class Settings(BaseSettings):
     APP_NAME: str = "ChefLink"
     APP_ENV: Literal["development", "staging", "production"] = "development"
     DEBUG: bool = True
+    # Explicit origin list; a wildcard forces the CORS middleware to
+    # reflect Origin and emit Vary: Origin on every response
+    ALLOWED_ORIGINS: list[str] = ["http://localhost:3000", "http://localhost:8000"]
+    # Concurrent LLM extractions per book ingest; bounded so one book
+    # can't drain the DB pool or trip API rate limits
+    MAX_CONCURRENT_RECIPE_INGEST: int = 4
 
     # Database
     DATABASE_URL: PostgresDsn
     DATABASE_SYNC_URL: str
+    # Pool sizing is tuned to Postgres max_connections; override per deploy
+    DB_POOL_SIZE: int = 25
+    DB_MAX_OVERFLOW: int = 25
 
     # Telegram Bot
     TELEGRAM_BOT_TOKEN: str
@@ -49,4 +59,15 @@ class Settings(BaseSettings):
         return v
 
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build settings once per process.
+
+    Usable directly or as a FastAPI dependency (`Depends(get_settings)`),
+    which lets tests override configuration via dependency_overrides without
+    re-running .env parsing and field validation per request.
+    """
+    return Settings()
+
+
+settings = get_settings()
\ No newline at end of file
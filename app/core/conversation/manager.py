@@ -2,52 +2,146 @@
 Conversation context manager to handle conversation state, history, and token management.
 Provides a clean abstraction for managing LLM conversations.
 """
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Protocol, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime
+import asyncio
+import functools
+import time
 import json
 import logging
+
+import orjson
+from bisect import bisect_right
 from collections import deque
+from itertools import accumulate
+
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+def _export_encoder(obj: Any) -> Any:
+    """orjson fallback for types it can't serialize natively"""
+    if isinstance(obj, Message):
+        return {
+            "role": obj.role,
+            "content": obj.content,
+            "timestamp": obj.timestamp,
+            "metadata": obj.metadata,
+            "tokens": obj.token_count
+        }
+    if isinstance(obj, deque):
+        return list(obj)
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+
+class TokenizerProtocol(Protocol):
+    """Counts tokens for message content. Implemented per LLM provider."""
+
+    def count_tokens(self, text: str) -> int:
+        ...
+
+
+class TiktokenTokenizer:
+    """Exact token counts via tiktoken's cl100k_base encoding (OpenAI models)."""
+
+    def __init__(self) -> None:
+        import tiktoken
+        self._encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(self, text: str) -> int:
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+
+class CharEstimateTokenizer:
+    """Fallback estimator (~4 characters per token) for providers without
+    a local tokenizer (Anthropic)."""
+
+    def count_tokens(self, text: str) -> int:
+        return len(text) // 4
+
+
+_tokenizer: Optional[TokenizerProtocol] = None
+
+
+def get_tokenizer() -> TokenizerProtocol:
+    """Get the tokenizer for the configured LLM provider, created once."""
+    global _tokenizer
+    if _tokenizer is None:
+        if settings.LLM_PROVIDER == "openai":
+            _tokenizer = TiktokenTokenizer()
+        else:
+            _tokenizer = CharEstimateTokenizer()
+    return _tokenizer
+
+
+def set_tokenizer(tokenizer: Optional[TokenizerProtocol]) -> None:
+    """Override the tokenizer (pass None to reset). Primarily for tests."""
+    global _tokenizer
+    _tokenizer = tokenizer
+    _count_tokens.cache_clear()
+
+
+@functools.lru_cache(maxsize=4096)
+def _count_tokens(content: str) -> int:
+    """Count tokens, deduping repeated content (e.g. shared system prompts)."""
+    return get_tokenizer().count_tokens(content)
+
+
+@dataclass(slots=True)
 class Message:
     """Represents a single message in the conversation"""
     role: str  # "user", "assistant", "system"
     content: str
-    timestamp: datetime = field(default_factory=datetime.now)
+    # Integer nanoseconds are ~10x cheaper to create than a datetime and are
+    # only converted when a caller actually reads .timestamp
+    timestamp_ns: int = field(default_factory=time.time_ns)
     metadata: Dict[str, Any] = field(default_factory=dict)
     token_count: int = 0
-    
+    _dict_cache: Optional[Dict[str, str]] = field(
+        default=None, repr=False, compare=False
+    )
+
+    @property
+    def timestamp(self) -> datetime:
+        """Creation time as a datetime, derived on access"""
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9)
+
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for LLM API"""
-        return {
-            "role": self.role,
-            "content": self.content
-        }
+        """Convert to dictionary for LLM API (cached; content rarely mutates)"""
+        if self._dict_cache is None:
+            self._dict_cache = {
+                "role": self.role,
+                "content": self.content
+            }
+        return self._dict_cache
     
     def estimate_tokens(self) -> int:
-        """Estimate token count for this message"""
-        # Simple estimation: ~4 characters per token
-        # In production, use tiktoken or provider-specific tokenizer
+        """Estimate token count for this message (memoized on first call)"""
         if self.token_count == 0:
-            self.token_count = len(self.content) // 4
+            self.token_count = _count_tokens(self.content)
         return self.token_count
 
 
-@dataclass
 class ConversationContext:
     """
     Manages conversation context with intelligent history management.
     Handles token limits, context compression, and message prioritization.
     """
-    
-    max_tokens: int = 8000
-    max_messages: int = 20
-    system_prompt: Optional[str] = None
-    
+
+    # Slotted: thousands of concurrent contexts each hold many messages, so
+    # dropping per-instance __dict__ roughly halves resident memory
+    __slots__ = (
+        "max_tokens",
+        "max_messages",
+        "system_prompt",
+        "messages",
+        "total_tokens",
+        "compression_count",
+        "_system_msg",
+    )
+
     def __init__(
         self,
         max_tokens: int = 8000,
@@ -57,7 +151,11 @@ class ConversationContext:
         self.max_tokens = max_tokens
         self.max_messages = max_messages
         self.system_prompt = system_prompt
-        self.messages: deque[Message] = deque(maxlen=max_messages * 2)  # Keep extra for compression
+        # Built once: the system prompt dict is identical for every LLM call
+        self._system_msg: Optional[Dict[str, str]] = (
+            {"role": "system", "content": system_prompt} if system_prompt else None
+        )
+        self.messages: deque[Message] = deque()  # Bounded explicitly in add_message
         self.total_tokens = 0
         self.compression_count = 0
     
@@ -75,11 +173,34 @@ class ConversationContext:
         
         self.messages.append(message)
         self.total_tokens += message.token_count
-        
-        # Check if compression needed
-        if self.total_tokens > self.max_tokens:
+
+        # Evict oldest messages past the hard cap (keep extra for compression),
+        # keeping total_tokens in sync so the compression trigger stays exact
+        while len(self.messages) > self.max_messages * 2:
+            evicted = self.messages.popleft()
+            self.total_tokens -= evicted.token_count
+
+        # Check if compression needed (at 75% so there is headroom for the
+        # next response; total_tokens already includes the new message)
+        if self.total_tokens > self.max_tokens * 0.75:
             self._compress_context()
-    
+
+    def update_from_llm_response(self, usage: Dict[str, Any]) -> None:
+        """
+        Sync token accounting with the provider-reported prompt token count.
+
+        The local tokenizer only estimates; the usage block returned by each
+        LLM roundtrip is ground truth, so adopt it when present. Subsequent
+        add_message calls then only add the new message's (small) estimate.
+
+        Args:
+            usage: Usage dict from the LLM response
+                   (OpenAI: prompt_tokens, Anthropic: input_tokens)
+        """
+        prompt_tokens = usage.get("prompt_tokens") or usage.get("input_tokens")
+        if prompt_tokens:
+            self.total_tokens = prompt_tokens
+
     def get_context_for_llm(self, include_system: bool = True) -> List[Dict[str, str]]:
         """
         Get the conversation context formatted for LLM API.
@@ -90,18 +211,32 @@ class ConversationContext:
         Returns:
             List of message dictionaries
         """
-        messages = []
-        
-        # Add system prompt if provided
-        if include_system and self.system_prompt:
-            messages.append({"role": "system", "content": self.system_prompt})
-        
-        # Add conversation messages
-        for message in self.messages:
-            messages.append(message.to_dict())
-        
-        return messages
+        prefix = [self._system_msg] if include_system and self._system_msg else []
+        return prefix + [message.to_dict() for message in self.messages]
     
+    def _groups(self) -> List[List[Message]]:
+        """
+        Split the history into atomic units for compression.
+
+        An assistant message carrying tool_calls is bundled with the tool
+        response messages that follow it, so the pair is kept or dropped as
+        one unit; every other message forms a group of its own.
+        """
+        groups: List[List[Message]] = []
+        for message in self.messages:
+            is_tool_response = (
+                message.role == "tool" or "tool_call_id" in message.metadata
+            )
+            if (
+                is_tool_response
+                and groups
+                and "tool_calls" in groups[-1][0].metadata
+            ):
+                groups[-1].append(message)
+            else:
+                groups.append([message])
+        return groups
+
     def _compress_context(self) -> None:
         """
         Compress conversation context when approaching token limit.
@@ -110,41 +245,140 @@ class ConversationContext:
         logger.info(f"Compressing context (attempt #{self.compression_count + 1})")
         self.compression_count += 1
         
-        # Strategy 1: Remove old assistant messages first (keep user messages for context)
-        messages_to_keep = deque()
-        current_tokens = 0
-        
+        # Work on atomic groups so a tool-call message is never separated
+        # from its tool responses (that would break the tool-use protocol)
+        groups = self._groups()
+
         # Always keep the system prompt token count
-        if self.system_prompt:
-            current_tokens += len(self.system_prompt) // 4
-        
-        # Keep recent messages up to 70% of max tokens
+        base_tokens = _count_tokens(self.system_prompt) if self.system_prompt else 0
+
+        # The first group and the 5 most recent groups are always preserved
+        head = groups[:1]
+        tail = groups[1:][-5:]
+        middle = groups[1:-5] if len(groups) > 6 else []
+        pinned_tokens = base_tokens + sum(
+            m.token_count for group in head + tail for m in group
+        )
+
+        # Keep recent middle groups up to 70% of max tokens. Running sums
+        # over the reversed groups let us binary-search the cutoff instead
+        # of re-accumulating per group: suffix[k] = tokens of the newest k.
         target_tokens = int(self.max_tokens * 0.7)
-        
-        # Iterate from newest to oldest
-        for message in reversed(self.messages):
-            if current_tokens + message.token_count <= target_tokens:
-                messages_to_keep.appendleft(message)
-                current_tokens += message.token_count
-            else:
-                # For older messages, only keep user messages (they provide context)
-                if message.role == "user" and current_tokens + message.token_count <= self.max_tokens:
-                    messages_to_keep.appendleft(message)
-                    current_tokens += message.token_count
-        
-        self.messages = messages_to_keep
-        self.total_tokens = current_tokens
-        
-        # Add compression summary if significant content was removed
-        if self.compression_count == 1:
-            summary = Message(
+        group_tokens = [sum(m.token_count for m in g) for g in middle]
+        suffix = list(accumulate(reversed(group_tokens), initial=pinned_tokens))
+        keep_recent = max(bisect_right(suffix, target_tokens) - 1, 0)
+        recent = middle[len(middle) - keep_recent:]
+        current_tokens = suffix[keep_recent]
+
+        # For older groups, only keep plain user messages (they provide
+        # context), newest first, up to the hard token limit
+        older_users = [
+            g for g in middle[:len(middle) - keep_recent]
+            if len(g) == 1 and g[0].role == "user"
+        ]
+        older_suffix = list(accumulate(
+            (g[0].token_count for g in reversed(older_users)),
+            initial=current_tokens,
+        ))
+        keep_older = max(bisect_right(older_suffix, self.max_tokens) - 1, 0)
+        kept = (
+            head
+            + older_users[len(older_users) - keep_older:]
+            + recent
+            + tail
+        )
+
+        kept_ids = {id(group) for group in kept}
+        dropped = [m for group in groups if id(group) not in kept_ids for m in group]
+
+        self.messages = deque(m for group in kept for m in group)
+        self.total_tokens = older_suffix[keep_older]
+
+        # Stand in for the dropped span immediately; a background task
+        # replaces the stub with an LLM summary once it completes
+        if dropped and self.compression_count == 1:
+            stub = Message(
                 role="system",
                 content="[Previous conversation history compressed. Key context maintained.]",
                 metadata={"compression": True}
             )
-            summary.estimate_tokens()
-            self.messages.appendleft(summary)
-            self.total_tokens += summary.token_count
+            stub.estimate_tokens()
+            self.messages.appendleft(stub)
+            self.total_tokens += stub.token_count
+            self._schedule_summary(dropped, stub)
+
+    def _schedule_summary(self, dropped: List[Message], stub: Message) -> None:
+        """Kick off background summarization of dropped messages, if possible"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return  # No event loop (sync context): keep the stub as-is
+        asyncio.create_task(self._replace_stub_with_summary(dropped, stub))
+
+    async def _replace_stub_with_summary(
+        self, dropped: List[Message], stub: Message
+    ) -> None:
+        """
+        Summarize dropped messages in the background and swap the summary
+        into the stub message, without blocking the add_message hot path.
+        """
+        # Short messages aren't worth an LLM call; carry them over verbatim
+        to_summarize = [m for m in dropped if m.token_count >= 50]
+        verbatim = [m for m in dropped if m.token_count < 50]
+
+        # Batch calls through a small semaphore with staggered submission
+        # to avoid hammering the provider
+        semaphore = asyncio.Semaphore(2)
+
+        async def summarize(batch: List[Message]) -> str:
+            async with semaphore:
+                return await self._summarize_batch(batch)
+
+        batches = [to_summarize[i:i + 10] for i in range(0, len(to_summarize), 10)]
+        tasks = []
+        for batch in batches:
+            tasks.append(asyncio.create_task(summarize(batch)))
+            await asyncio.sleep(1)
+
+        try:
+            summaries = await asyncio.gather(*tasks)
+        except Exception as e:
+            logger.warning(f"Context summarization failed, keeping stub: {str(e)}")
+            return
+
+        parts = [s for s in summaries if s]
+        parts.extend(f"{m.role}: {m.content}" for m in verbatim)
+        summary = "\n".join(parts)
+
+        # Only adopt the summary if it actually shrank the dropped content
+        original_length = sum(len(m.content) for m in dropped)
+        if not summary or len(summary) >= original_length:
+            return
+
+        if any(m is stub for m in self.messages):
+            self.total_tokens -= stub.token_count
+            stub.content = f"[Summary of earlier conversation]\n{summary}"
+            stub.token_count = 0
+            stub._dict_cache = None
+            self.total_tokens += stub.estimate_tokens()
+
+    async def _summarize_batch(self, messages: List[Message]) -> str:
+        """Summarize one batch of dropped messages via the LLM"""
+        from app.services.llm.factory import get_llm_service
+
+        transcript = "\n".join(f"{m.role}: {m.content}" for m in messages)
+        llm_service = get_llm_service()
+        response = await llm_service.client.messages.create(
+            model=llm_service.model,
+            max_tokens=1000,
+            temperature=0.1,
+            system=(
+                "Summarize the following conversation excerpt in a few "
+                "sentences. Preserve facts, decisions, and user preferences."
+            ),
+            messages=[{"role": "user", "content": transcript}]
+        )
+        return response.content[0].text
     
     def get_token_usage(self) -> Dict[str, int]:
         """Get current token usage statistics"""
@@ -180,6 +414,45 @@ class ConversationContext:
                     tool_calls.append((message, tool_call))
         return tool_calls
     
+    @classmethod
+    def from_export(cls, data: Dict[str, Any]) -> "ConversationContext":
+        """Rebuild a context from an export_conversation() payload"""
+        stats = data.get("stats", {})
+        context = cls(
+            max_tokens=stats.get("max_tokens", 8000),
+            system_prompt=data.get("system_prompt")
+        )
+        for msg in data.get("messages", []):
+            message = Message(
+                role=msg["role"],
+                content=msg["content"],
+                timestamp_ns=int(
+                    datetime.fromisoformat(msg["timestamp"]).timestamp() * 1e9
+                ),
+                metadata=msg.get("metadata", {}),
+                token_count=msg.get("tokens", 0)
+            )
+            context.messages.append(message)
+            context.total_tokens += message.estimate_tokens()
+        context.compression_count = stats.get("compression_count", 0)
+        return context
+
+    def dump_bytes(self) -> bytes:
+        """Serialize the conversation straight to JSON bytes.
+
+        Encodes Message objects directly via orjson instead of materializing
+        the intermediate dict tree that export_conversation builds.
+        """
+        return orjson.dumps(
+            {
+                "system_prompt": self.system_prompt,
+                "messages": self.messages,
+                "stats": self.get_token_usage()
+            },
+            default=_export_encoder,
+            option=orjson.OPT_NAIVE_UTC | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+
     def export_conversation(self) -> Dict[str, Any]:
         """Export entire conversation for debugging or logging"""
         return {
@@ -0,0 +1,81 @@
+"""
+Redis-backed storage for conversation contexts.
+Lets any Uvicorn worker or replica serve any conversation instead of pinning
+state to the process that first handled the user.
+"""
+from typing import Optional
+import logging
+
+import orjson
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.conversation.manager import ConversationContext
+
+logger = logging.getLogger(__name__)
+
+
+class RedisConversationStore:
+    """
+    Shares conversation contexts across workers via Redis.
+
+    Contexts are serialized straight to JSON bytes via dump_bytes (one
+    orjson pass, no intermediate dict tree) and expire after a TTL so
+    abandoned conversations don't accumulate.
+    """
+
+    KEY_PREFIX = "cheflink:conv:"
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        ttl_seconds: int = 3600,
+        default_max_tokens: int = 8000
+    ):
+        self._redis = redis.from_url(redis_url or settings.REDIS_URL)
+        self.ttl_seconds = ttl_seconds
+        self.default_max_tokens = default_max_tokens
+
+    def _key(self, conversation_id: str) -> str:
+        return f"{self.KEY_PREFIX}{conversation_id}"
+
+    async def load(self, conversation_id: str) -> Optional[ConversationContext]:
+        """Load a context, refreshing its TTL in the same roundtrip"""
+        key = self._key(conversation_id)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.expire(key, self.ttl_seconds)
+            payload, _ = await pipe.execute()
+
+        if payload is None:
+            return None
+        return ConversationContext.from_export(orjson.loads(payload))
+
+    async def save(self, conversation_id: str, context: ConversationContext) -> None:
+        """Persist a context with the store's TTL"""
+        await self._redis.set(
+            self._key(conversation_id), context.dump_bytes(), ex=self.ttl_seconds
+        )
+
+    async def get_or_create_context(
+        self,
+        conversation_id: str,
+        system_prompt: Optional[str] = None,
+        max_tokens: Optional[int] = None
+    ) -> ConversationContext:
+        """Load existing context or create a new one"""
+        context = await self.load(conversation_id)
+        if context is None:
+            context = ConversationContext(
+                max_tokens=max_tokens or self.default_max_tokens,
+                system_prompt=system_prompt
+            )
+        return context
+
+    async def remove_context(self, conversation_id: str) -> None:
+        """Remove a conversation context entirely"""
+        await self._redis.delete(self._key(conversation_id))
+
+    async def close(self) -> None:
+        """Close the underlying Redis connection pool"""
+        await self._redis.aclose()
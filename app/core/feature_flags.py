@@ -1,45 +1,63 @@
 import os
-from typing import Dict, Any
-import json
+from types import MappingProxyType
+from typing import Dict, Any, Final, Mapping
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _load_flags() -> Dict[str, Any]:
+    """Load feature flags from the environment in a single scan."""
+    use_agentic = os.environ.get("USE_AGENTIC_WORKFLOW", "false").lower() == "true"
+
+    # Simple flags
+    return {
+        "agentic_workflow": use_agentic,
+        "increased_context_window": use_agentic,  # Enabled together
+        "debug_mode": os.environ.get("DEBUG_MODE", "false").lower() == "true"
+    }
+
+
+# Immutable snapshot taken once at import; request paths never re-read the
+# environment.
+_FLAGS: Mapping[str, Any] = MappingProxyType(_load_flags())
+
+# Hot-path constants: consumers that check a flag per request can import
+# these directly instead of going through a dict lookup.
+AGENTIC_WORKFLOW: Final[bool] = _FLAGS["agentic_workflow"]
+DEBUG_MODE: Final[bool] = _FLAGS["debug_mode"]
+
+
 class FeatureFlags:
     """Simple feature flag system for gradual rollout."""
-    
+
     def __init__(self):
-        self._flags = self._load_flags()
-    
-    def _load_flags(self) -> Dict[str, Any]:
-        """Load feature flags from environment or config file."""
-        # First try environment variable
-        use_agentic = os.environ.get("USE_AGENTIC_WORKFLOW", "false").lower() == "true"
-        
-        # Simple flags
-        return {
-            "agentic_workflow": use_agentic,
-            "increased_context_window": use_agentic,  # Enabled together
-            "debug_mode": os.environ.get("DEBUG_MODE", "false").lower() == "true"
-        }
-    
+        self._flags = _FLAGS
+        self._overrides: Dict[str, Any] = {}  # dev/test-only mutations
+
     def is_enabled(self, flag_name: str, user_id: str = None) -> bool:
         """Check if a feature flag is enabled."""
+        if flag_name in self._overrides:
+            return bool(self._overrides[flag_name])
         return self._flags.get(flag_name, False)
-    
+
     def get_config(self, flag_name: str) -> Dict[str, Any]:
         """Get full configuration for a feature flag."""
+        if flag_name in self._overrides:
+            return self._overrides[flag_name]
         return self._flags.get(flag_name, {})
-    
+
     def update_flag(self, flag_name: str, config: Dict[str, Any]) -> None:
-        """Update a feature flag configuration (for testing)."""
-        self._flags[flag_name] = config
-    
+        """Override a feature flag configuration (for testing)."""
+        self._overrides[flag_name] = config
+
     def reload(self) -> None:
-        """Reload flags from source."""
-        self._flags = self._load_flags()
+        """Re-read flags from the environment into a fresh snapshot."""
+        global _FLAGS
+        _FLAGS = MappingProxyType(_load_flags())
+        self._flags = _FLAGS
+        self._overrides.clear()
 
 
 # Global instance
-feature_flags = FeatureFlags()
\ No newline at end of file
+feature_flags = FeatureFlags()
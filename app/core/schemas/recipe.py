@@ -1,24 +1,28 @@
-from typing import Any
-
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class MacroNutrients(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     protein_g: int = Field(..., ge=0)
     fat_g: int = Field(..., ge=0)
     carbohydrates_g: int = Field(..., ge=0)
 
 
 class RecipeBase(BaseModel):
+    # Frozen models are slotted and hashable; ignoring extras skips the
+    # unknown-field rejection branch on the bulk-ingest hot path.
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     recipe_name: str = Field(..., min_length=1, max_length=255)
     recipe_author: str | None = None
     recipe_book: str | None = None
     page_reference: str | None = None
     servings: int = Field(1, ge=1)
     instructions: str = Field(..., min_length=1)
-    ingredients: list[str] = Field(..., min_items=1)
+    ingredients: list[str] = Field(..., min_length=1)
     ingredients_original: list[str] | None = None
-    main_protein: list[str] = Field(..., min_items=0)
+    main_protein: list[str] = Field(..., min_length=0)
     calories_per_serving: int = Field(..., ge=0)
     macro_nutrients: MacroNutrients
 
@@ -28,13 +32,14 @@ class RecipeCreate(RecipeBase):
 
 
 class RecipeInDB(RecipeBase):
-    id: str
+    model_config = ConfigDict(from_attributes=True, frozen=True, extra="ignore")
 
-    class Config:
-        from_attributes = True
+    id: str
 
 
 class RecipeSearch(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
     calories_min: int | None = Field(None, ge=0)
     calories_max: int | None = Field(None, ge=0)
     protein_min: int | None = Field(None, ge=0)
@@ -49,11 +54,11 @@ class RecipeIngestionRequest(BaseModel):
     pdf_content: bytes | None = None
     pdf_path: str | None = None
 
-    @field_validator("pdf_content", "pdf_path")
-    def validate_pdf_input(cls, v: Any, values: dict[str, Any]) -> Any:
-        if not v and not values.get("pdf_path") and not values.get("pdf_content"):
+    @model_validator(mode="after")
+    def validate_pdf_input(self) -> "RecipeIngestionRequest":
+        if not (self.pdf_content or self.pdf_path):
             raise ValueError("Either pdf_content or pdf_path must be provided")
-        return v
+        return self
 
 
 class RecipeIngestionResponse(BaseModel):
@@ -4,13 +4,17 @@ Eliminates duplication between family_v2 and family_v2_agentic handlers.
 """
 from typing import Dict, Any, Optional, List
 from uuid import UUID
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import logging
-import json
 
+import numpy as np
+import orjson
+
+from sqlalchemy import insert, literal_column, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.models import User, Recipe, MealPlan
+from app.database.models import MealType, User, Recipe, MealPlan
 from app.services.recipe_service import RecipeService
 from app.services.meal_planning_service import MealPlanningService
 from app.services.nutrition_service import NutritionService
@@ -19,10 +23,32 @@ from app.core.tools.registry import get_tool_registry
 logger = logging.getLogger(__name__)
 
 
+def dumps_result(result: Dict[str, Any]) -> str:
+    """Serialize a tool result for an LLM message.
+
+    orjson runs in C and handles date/UUID values natively, which the nested
+    meal-plan and nutrition payloads rely on.
+    """
+    return orjson.dumps(result).decode()
+
+
+def _parse_ymd(date_str: str) -> date:
+    """Parse a YYYY-MM-DD string.
+
+    The tool schemas fix this format, so use C-implemented fromisoformat
+    instead of strptime's format-compiling state machine.
+    """
+    return date.fromisoformat(date_str)
+
+
 class ToolExecutor:
     """
     Centralized tool executor that handles all tool executions.
     Provides a clean separation between tool definition and execution.
+    
+    Executors only flush work into the caller's session; the handler that
+    owns the session commits once per turn, so a multi-tool LLM turn costs
+    one WAL fsync instead of one per tool.
     """
     
     def __init__(
@@ -44,12 +70,14 @@ class ToolExecutor:
         )
         self.nutrition_service = nutrition_service or NutritionService()
         
-        # Register executors for each tool
+        # Register executors for each tool; keep the registry on the
+        # instance so execute() skips the module-global lookup per call
+        self._registry = get_tool_registry()
         self._register_executors()
     
     def _register_executors(self):
         """Register executor functions for all tools"""
-        registry = get_tool_registry()
+        registry = self._registry
         
         # Meal Planning Tools
         registry.attach_executor("create_meal_plan", self._execute_create_meal_plan)
@@ -81,18 +109,16 @@ class ToolExecutor:
         Raises:
             ValueError: If tool not found or execution fails
         """
-        registry = get_tool_registry()
-        tool = registry.get_tool(tool_name)
+        # Direct dict lookup; _register_executors attached an executor to
+        # every tool, so an entry here is guaranteed runnable
+        tool = self._registry._tools.get(tool_name)
         
         if not tool:
             raise ValueError(f"Tool '{tool_name}' not found")
         
-        if not tool.executor:
-            raise ValueError(f"No executor registered for tool '{tool_name}'")
-        
         try:
-            # Validate parameters against tool definition
-            self._validate_parameters(tool, parameters)
+            # Validate parameters with the tool's precompiled validator
+            tool.validator(parameters)
             
             # Execute the tool
             result = await tool.executor(parameters)
@@ -108,21 +134,6 @@ class ToolExecutor:
                 "error": str(e)
             }
     
-    def _validate_parameters(self, tool, parameters: Dict[str, Any]):
-        """Validate parameters against tool definition"""
-        # Check required parameters
-        for param in tool.parameters:
-            if param.required and param.name not in parameters:
-                raise ValueError(f"Missing required parameter: {param.name}")
-            
-            # Validate enum values
-            if param.enum and param.name in parameters:
-                if parameters[param.name] not in param.enum:
-                    raise ValueError(
-                        f"Invalid value for {param.name}: {parameters[param.name]}. "
-                        f"Must be one of: {param.enum}"
-                    )
-    
     # Tool Execution Methods
     
     async def _execute_create_meal_plan(self, params: Dict[str, Any]) -> Dict:
@@ -131,31 +142,40 @@ class ToolExecutor:
         meals = params["meals"]
         
         # Parse date
-        meal_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        meal_date = _parse_ymd(date_str)
         
-        # Create meal plans
+        # Fetch every referenced recipe in one IN-query instead of one
+        # round-trip per meal
+        recipe_ids = [UUID(meal_data["recipe_id"]) for meal_data in meals]
+        result = await self.db.execute(
+            select(Recipe).where(Recipe.id.in_(recipe_ids))
+        )
+        recipes_by_id = {recipe.id: recipe for recipe in result.scalars().all()}
+
+        # Create meal plans with one multi-row INSERT; ORM add() would emit
+        # a statement per row and track identities we never read back
         created_plans = []
-        for meal_data in meals:
-            recipe = await self.recipe_service.get_recipe(UUID(meal_data["recipe_id"]))
+        plan_rows = []
+        for meal_data, recipe_id in zip(meals, recipe_ids):
+            recipe = recipes_by_id.get(recipe_id)
             if not recipe:
                 continue
-            
-            meal_plan = MealPlan(
-                user_id=self.user.id,
-                recipe_id=recipe.id,
-                date=meal_date,
-                meal_type=meal_data["meal_type"],
-                servings=meal_data.get("servings", 1)
-            )
-            
-            self.db.add(meal_plan)
+
+            plan_rows.append({
+                "user_id": self.user.id,
+                "recipe_id": recipe.id,
+                "date": meal_date,
+                "meal_type": MealType(meal_data["meal_type"]),
+                "servings": meal_data.get("servings", 1)
+            })
             created_plans.append({
                 "meal_type": meal_data["meal_type"],
                 "recipe_name": recipe.recipe_name,
                 "servings": meal_data.get("servings", 1)
             })
-        
-        await self.db.commit()
+
+        if plan_rows:
+            await self.db.execute(insert(MealPlan).values(plan_rows))
         
         return {
             "date": date_str,
@@ -165,54 +185,56 @@ class ToolExecutor:
     async def _execute_update_meal_plan(self, params: Dict[str, Any]) -> Dict:
         """Execute update_meal_plan tool"""
         date_str = params["date"]
-        meal_type = params["meal_type"]
-        recipe_id = params["recipe_id"]
+        meal_type = MealType(params["meal_type"])
+        recipe_id = UUID(params["recipe_id"])
         servings = params.get("servings", 1)
         
         # Parse date
-        meal_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-        
-        # Find existing meal plan
-        existing = await self.db.query(MealPlan).filter(
-            MealPlan.user_id == self.user.id,
-            MealPlan.date == meal_date,
-            MealPlan.meal_type == meal_type
-        ).first()
-        
-        if existing:
-            # Update existing
-            existing.recipe_id = UUID(recipe_id)
-            existing.servings = servings
-        else:
-            # Create new
-            meal_plan = MealPlan(
+        meal_date = _parse_ymd(date_str)
+        
+        # Single UPSERT against the (user_id, date, meal_type) unique key
+        # instead of SELECT-then-INSERT-or-UPDATE; xmax <> 0 tells us
+        # whether an existing row was updated
+        stmt = (
+            pg_insert(MealPlan)
+            .values(
                 user_id=self.user.id,
-                recipe_id=UUID(recipe_id),
                 date=meal_date,
                 meal_type=meal_type,
+                recipe_id=recipe_id,
                 servings=servings
             )
-            self.db.add(meal_plan)
-        
-        await self.db.commit()
+            .on_conflict_do_update(
+                constraint="uq_user_date_meal",
+                set_={
+                    "recipe_id": recipe_id,
+                    "servings": servings,
+                    "updated_at": datetime.utcnow()
+                }
+            )
+            .returning(literal_column("(xmax <> 0)").label("updated"))
+        )
+        result = await self.db.execute(stmt)
+        updated = result.scalar_one()
         
-        # Get recipe details for response
-        recipe = await self.recipe_service.get_recipe(UUID(recipe_id))
+        recipe_name = (await self.db.execute(
+            select(Recipe.recipe_name).where(Recipe.id == recipe_id)
+        )).scalar_one_or_none()
         
         return {
             "date": date_str,
-            "meal_type": meal_type,
-            "recipe_name": recipe.recipe_name if recipe else "Unknown",
+            "meal_type": meal_type.value,
+            "recipe_name": recipe_name or "Unknown",
             "servings": servings,
-            "updated": bool(existing)
+            "updated": bool(updated)
         }
     
     async def _execute_get_meal_plans(self, params: Dict[str, Any]) -> Dict:
         """Execute get_meal_plans tool"""
         # Determine date range
         if "start_date" in params and "end_date" in params:
-            start_date = datetime.strptime(params["start_date"], "%Y-%m-%d").date()
-            end_date = datetime.strptime(params["end_date"], "%Y-%m-%d").date()
+            start_date = _parse_ymd(params["start_date"])
+            end_date = _parse_ymd(params["end_date"])
         else:
             days = params.get("days", 7)
             start_date = datetime.now().date()
@@ -307,7 +329,7 @@ class ToolExecutor:
         date_str = params["date"]
         meal_type = params.get("meal_type", "all")
         
-        meal_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        meal_date = _parse_ymd(date_str)
         
         # Get meal plans for the date
         meal_plans = await self.meal_planning_service.get_user_meal_plans(
@@ -320,36 +342,48 @@ class ToolExecutor:
         if meal_type != "all":
             meal_plans = [mp for mp in meal_plans if mp.meal_type == meal_type]
         
-        # Calculate nutrition
+        # Vectorize the per-serving scaling and totals: one (meals x 4)
+        # matrix multiply-and-sum in C instead of four Python += per meal
+        plans = [p for p in meal_plans if p.recipe.macro_nutrients]
+        if plans:
+            macros = np.array(
+                [
+                    [
+                        p.recipe.calories_per_serving,
+                        p.recipe.macro_nutrients.get("protein_g", 0),
+                        p.recipe.macro_nutrients.get("fat_g", 0),
+                        p.recipe.macro_nutrients.get("carbohydrates_g", 0)
+                    ]
+                    for p in plans
+                ],
+                dtype=np.float64
+            )
+            servings = np.array([p.servings for p in plans], dtype=np.float64)
+            per_meal = macros * servings[:, None]
+            totals = per_meal.sum(axis=0)
+        else:
+            per_meal = np.zeros((0, 4))
+            totals = np.zeros(4)
+        
+        meal_breakdown = [
+            {
+                "meal_type": plan.meal_type,
+                "recipe_name": plan.recipe.recipe_name,
+                "servings": plan.servings,
+                "calories": per_meal[i, 0].item(),
+                "protein_g": per_meal[i, 1].item(),
+                "fat_g": per_meal[i, 2].item(),
+                "carbohydrates_g": per_meal[i, 3].item()
+            }
+            for i, plan in enumerate(plans)
+        ]
         total_nutrition = {
-            "calories": 0,
-            "protein_g": 0,
-            "fat_g": 0,
-            "carbohydrates_g": 0
+            "calories": totals[0].item(),
+            "protein_g": totals[1].item(),
+            "fat_g": totals[2].item(),
+            "carbohydrates_g": totals[3].item()
         }
         
-        meal_breakdown = []
-        for plan in meal_plans:
-            recipe = plan.recipe
-            if recipe.macro_nutrients:
-                meal_nutrition = {
-                    "meal_type": plan.meal_type,
-                    "recipe_name": recipe.recipe_name,
-                    "servings": plan.servings,
-                    "calories": recipe.calories_per_serving * plan.servings,
-                    "protein_g": recipe.macro_nutrients.get("protein_g", 0) * plan.servings,
-                    "fat_g": recipe.macro_nutrients.get("fat_g", 0) * plan.servings,
-                    "carbohydrates_g": recipe.macro_nutrients.get("carbohydrates_g", 0) * plan.servings
-                }
-                
-                meal_breakdown.append(meal_nutrition)
-                
-                # Add to totals
-                total_nutrition["calories"] += meal_nutrition["calories"]
-                total_nutrition["protein_g"] += meal_nutrition["protein_g"]
-                total_nutrition["fat_g"] += meal_nutrition["fat_g"]
-                total_nutrition["carbohydrates_g"] += meal_nutrition["carbohydrates_g"]
-        
         return {
             "date": date_str,
             "meal_type": meal_type,
@@ -361,14 +395,15 @@ class ToolExecutor:
         """Execute update_dietary_preferences tool"""
         preferences = params["preferences"]
         
-        # Update user preferences
-        if not self.user.dietary_preferences:
-            self.user.dietary_preferences = {}
-        
-        self.user.dietary_preferences.update(preferences)
+        # Assign a fresh dict: in-place .update() on a JSON column doesn't
+        # trigger SQLAlchemy change detection, so the merge would silently
+        # never persist
+        self.user.dietary_preferences = {
+            **(self.user.dietary_preferences or {}),
+            **preferences
+        }
         
-        await self.db.commit()
-        await self.db.refresh(self.user)
+        # No refresh: the merged value is already in memory
         
         return {
             "updated": True,
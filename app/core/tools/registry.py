@@ -3,12 +3,39 @@ Centralized tool registry to eliminate duplication between handlers.
 Provides a single source of truth for tool definitions and execution.
 """
 from typing import Dict, List, Any, Optional, Callable
+from collections import defaultdict
 from dataclasses import dataclass, field
 from enum import Enum
 import logging
 
 logger = logging.getLogger(__name__)
 
+_MISSING = object()
+
+
+def _make_validator(
+    required: tuple,
+    enums: Dict[str, frozenset]
+) -> Callable[[Dict[str, Any]], None]:
+    """Compile a parameter validator specialized to one tool's schema.
+
+    Required names and enum sets are bound into the closure once at
+    registration, so per-call validation is just membership tests instead
+    of re-walking the ToolParameter list.
+    """
+    def validate(params: Dict[str, Any]) -> None:
+        for name in required:
+            if name not in params:
+                raise ValueError(f"Missing required parameter: {name}")
+        for name, allowed in enums.items():
+            value = params.get(name, _MISSING)
+            if value is not _MISSING and value not in allowed:
+                raise ValueError(
+                    f"Invalid value for {name}: {value}. "
+                    f"Must be one of: {sorted(allowed)}"
+                )
+    return validate
+
 
 class ToolCategory(Enum):
     """Categorizes tools by their functional domain"""
@@ -18,7 +45,7 @@ class ToolCategory(Enum):
     USER_PREFERENCES = "user_preferences"
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolParameter:
     """Defines a single parameter for a tool"""
     name: str
@@ -29,7 +56,7 @@ class ToolParameter:
     default: Any = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Tool:
     """Represents a single tool with its metadata and execution logic"""
     name: str
@@ -37,6 +64,7 @@ class Tool:
     category: ToolCategory
     parameters: List[ToolParameter]
     executor: Optional[Callable] = None
+    validator: Optional[Callable] = None
     
     def to_anthropic_schema(self) -> Dict:
         """Convert to Anthropic Claude tool schema format"""
@@ -102,6 +130,10 @@ class ToolRegistry:
     
     def __init__(self):
         self._tools: Dict[str, Tool] = {}
+        # Tool definitions are static after init; schemas are memoized per
+        # provider so each chat turn reuses the same serialized list
+        self._schema_cache: Dict[str, List[Dict]] = {}
+        self._by_category: Dict[ToolCategory, List[Tool]] = defaultdict(list)
         self._initialize_tools()
     
     def _initialize_tools(self):
@@ -279,9 +311,17 @@ class ToolRegistry:
     
     def register(self, tool: Tool) -> None:
         """Register a new tool"""
-        if tool.name in self._tools:
+        existing = self._tools.get(tool.name)
+        if existing is not None:
             logger.warning(f"Tool {tool.name} already registered, overwriting")
+            self._by_category[existing.category].remove(existing)
+        tool.validator = _make_validator(
+            tuple(p.name for p in tool.parameters if p.required),
+            {p.name: frozenset(p.enum) for p in tool.parameters if p.enum}
+        )
         self._tools[tool.name] = tool
+        self._by_category[tool.category].append(tool)
+        self._schema_cache.clear()
     
     def get_tool(self, name: str) -> Optional[Tool]:
         """Get a specific tool by name"""
@@ -289,7 +329,7 @@ class ToolRegistry:
     
     def get_tools_by_category(self, category: ToolCategory) -> List[Tool]:
         """Get all tools in a specific category"""
-        return [tool for tool in self._tools.values() if tool.category == category]
+        return self._by_category.get(category, [])
     
     def get_all_tools(self) -> List[Tool]:
         """Get all registered tools"""
@@ -302,15 +342,18 @@ class ToolRegistry:
         Args:
             provider: "anthropic" or "openai"
         """
-        tools = []
-        for tool in self._tools.values():
-            if provider == "anthropic":
-                tools.append(tool.to_anthropic_schema())
-            elif provider == "openai":
-                tools.append(tool.to_openai_schema())
-            else:
-                raise ValueError(f"Unknown provider: {provider}")
-        
+        cached = self._schema_cache.get(provider)
+        if cached is not None:
+            return cached
+
+        if provider == "anthropic":
+            tools = [tool.to_anthropic_schema() for tool in self._tools.values()]
+        elif provider == "openai":
+            tools = [tool.to_openai_schema() for tool in self._tools.values()]
+        else:
+            raise ValueError(f"Unknown provider: {provider}")
+
+        self._schema_cache[provider] = tools
         return tools
     
     def attach_executor(self, tool_name: str, executor: Callable) -> None:
@@ -1,30 +1,49 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 
 from app.core.config import settings
 
+def _async_database_url() -> str:
+    """Ensure the configured URL uses the asyncpg driver."""
+    url = str(settings.DATABASE_URL)
+    if url.startswith("postgresql://"):
+        url = url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    return url
+
+
 engine = create_async_engine(
-    str(settings.DATABASE_URL),
+    _async_database_url(),
     echo=settings.DEBUG,
     future=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=30,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    # Recipe search builds the same handful of statement shapes with varying
+    # bind values; a larger compiled-statement cache keeps them all warm.
+    query_cache_size=1200,
+    connect_args={
+        # Short OLTP queries don't benefit from Postgres JIT warm-up, and
+        # asyncpg's prepared-statement cache skips re-parsing hot queries.
+        "server_settings": {"jit": "off"},
+        "statement_cache_size": 1024,
+    },
 )
 
-AsyncSessionLocal = sessionmaker(
+AsyncSessionLocal = async_sessionmaker(
     engine,
-    class_=AsyncSession,
     expire_on_commit=False,
+    # Services flush once at commit; implicit flushes between add() calls
+    # just add round-trips
+    autoflush=False,
 )
 
 Base = declarative_base()
 
 
 async def get_db() -> AsyncSession:
+    # Services own their transaction boundaries; the context manager rolls
+    # back on error and returns the connection to the pool on exit.
     async with AsyncSessionLocal() as session:
-        try:
-            yield session
-            await session.commit()
-        except Exception:
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
\ No newline at end of file
+        yield session
\ No newline at end of file
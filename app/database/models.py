@@ -4,19 +4,21 @@ from datetime import date, datetime
 from typing import Any
 
 from sqlalchemy import (
-    JSON,
     Boolean,
     Column,
+    Computed,
     Date,
     DateTime,
     Enum,
+    Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship
 
 from app.database.base import Base
@@ -49,11 +51,19 @@ class Recipe(Base):
     page_reference = Column(String(500), nullable=True)
     servings = Column(Integer, nullable=False, default=1)
     instructions = Column(Text, nullable=False)
-    ingredients = Column(JSON, nullable=False)  # List of single-serving amounts
-    ingredients_original = Column(JSON, nullable=True)  # Original amounts
-    main_protein = Column(JSON, nullable=False)  # List of proteins
+    ingredients = Column(JSONB, nullable=False)  # List of single-serving amounts
+    ingredients_original = Column(JSONB, nullable=True)  # Original amounts
+    main_protein = Column(JSONB, nullable=False)  # List of proteins
     calories_per_serving = Column(Integer, nullable=False)
-    macro_nutrients = Column(JSON, nullable=False)  # {protein_g, fat_g, carbohydrates_g}
+    macro_nutrients = Column(JSONB, nullable=False)  # {protein_g, fat_g, carbohydrates_g}
+    # Stored generated columns: numeric macro values extracted once on
+    # write so range filters are sargable B-tree scans, not per-row
+    # JSON parses
+    protein_g_num = Column(Float, Computed("(macro_nutrients->>'protein_g')::double precision", persisted=True))
+    fat_g_num = Column(Float, Computed("(macro_nutrients->>'fat_g')::double precision", persisted=True))
+    carbs_g_num = Column(Float, Computed("(macro_nutrients->>'carbohydrates_g')::double precision", persisted=True))
+    # MealType values precomputed at ingest so planning never re-scans names
+    suitable_meal_types = Column(JSONB, nullable=False, default=list, server_default="[]")
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -72,8 +82,14 @@ class User(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     telegram_id = Column(String(100), unique=True, nullable=False)
     name = Column(String(255), nullable=False)
-    role = Column(Enum(UserRole), nullable=False)
-    dietary_preferences = Column(JSON, nullable=True, default=dict)
+    # native_enum=False stores the member name in VARCHAR + CHECK instead
+    # of a Postgres enum type: no oid->label lookup per row and no
+    # exclusive ALTER TYPE lock when members change
+    role = Column(
+        Enum(UserRole, native_enum=False, length=16, create_constraint=True, name="ck_users_role"),
+        nullable=False,
+    )
+    dietary_preferences = Column(JSONB, nullable=True, default=dict)
     invitation_code = Column(String(20), nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
@@ -88,18 +104,29 @@ class MealPlan(Base):
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     date = Column(Date, nullable=False)
-    meal_type = Column(Enum(MealType), nullable=False)
+    meal_type = Column(
+        Enum(MealType, native_enum=False, length=16, create_constraint=True, name="ck_meal_plans_meal_type"),
+        nullable=False,
+    )
     recipe_id = Column(UUID(as_uuid=True), ForeignKey("recipes.id"), nullable=False)
     servings = Column(Integer, nullable=False, default=1)
-    status = Column(Enum(MealPlanStatus), nullable=False, default=MealPlanStatus.UNLOCKED)
+    status = Column(
+        Enum(MealPlanStatus, native_enum=False, length=16, create_constraint=True, name="ck_meal_plans_status"),
+        nullable=False,
+        default=MealPlanStatus.UNLOCKED,
+    )
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     user = relationship("User", back_populates="meal_plans")
-    recipe = relationship("Recipe", back_populates="meal_plans")
+    # selectin: plans are always rendered with their recipe, so batch-load
+    # recipes in one IN-query instead of one lazy SELECT per plan
+    recipe = relationship("Recipe", back_populates="meal_plans", lazy="selectin")
 
-    # Unique constraint to prevent duplicate meals
+    # Unique constraint to prevent duplicate meals; the composite index
+    # backs the user_id + date BETWEEN range scans in meal-plan lookups
     __table_args__ = (
         UniqueConstraint("user_id", "date", "meal_type", name="uq_user_date_meal"),
+        Index("ix_meal_plans_user_date", "user_id", "date"),
     )
\ No newline at end of file
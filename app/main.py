@@ -1,19 +1,32 @@
+import hashlib
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.endpoints import health, recipes, users
 from app.core.config import settings
 from app.database.base import engine
 from app.database.models import Base
+from app.services.llm.factory import get_llm_service
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Startup: the schema is owned by Alembic (`alembic upgrade head` at
+    # deploy time); create_all only bootstraps a fresh local database
+    if settings.APP_ENV == "development":
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    else:
+        # Warm the pool so the first request doesn't pay connection setup
+        conn = await engine.connect()
+        await conn.close()
+    # Build the shared LLM client (and its HTTP pool) before serving
+    app.state.llm = get_llm_service()
     yield
     # Shutdown
     await engine.dispose()
@@ -23,12 +36,16 @@ app = FastAPI(
     title=settings.APP_NAME,
     version="0.1.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Middleware
+# Recipe and TOC payloads are repetitive JSON that compresses well; level 4
+# trades a little ratio for low CPU, and tiny bodies skip compression
+app.add_middleware(GZipMiddleware, minimum_size=500, compresslevel=4)
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -40,6 +57,17 @@ app.include_router(recipes.router, prefix="/api/v1/recipes", tags=["recipes"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["users"])
 
 
+# Constant body: serialize once and let revalidating clients 304
+_ROOT_BODY = orjson.dumps({"message": f"Welcome to {settings.APP_NAME}"})
+_ROOT_ETAG = f'"{hashlib.md5(_ROOT_BODY).hexdigest()}"'
+
+
 @app.get("/")
-async def root():
-    return {"message": f"Welcome to {settings.APP_NAME}"}
\ No newline at end of file
+async def root(request: Request):
+    if request.headers.get("if-none-match") == _ROOT_ETAG:
+        return Response(status_code=304, headers={"ETag": _ROOT_ETAG})
+    return Response(
+        content=_ROOT_BODY,
+        media_type="application/json",
+        headers={"ETag": _ROOT_ETAG},
+    )
\ No newline at end of file
@@ -1,84 +1,190 @@
 import secrets
 import string
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
-from sqlalchemy import select
+import redis.asyncio as redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database.models import User
+from app.core.config import settings
+
+# All workers share one hash of code -> "role|expires_epoch"
+_HASH_KEY = "cheflink:invite:codes"
+# Seconds a looked-up code may be served from the local cache before
+# re-checking Redis; bounds cross-worker staleness after admin changes
+_LOCAL_TTL = 60.0
+# Codes are user-supplied, so cap the cache: misses are never stored and
+# the oldest entry is evicted once the cap is hit
+_LOCAL_CACHE_MAX = 256
+
+_ALPHABET = (string.ascii_uppercase + string.digits).encode()
+# 252 is the largest multiple of len(_ALPHABET) below 256; rejecting
+# bytes above it keeps the modulo draw unbiased
+_REJECT_ABOVE = 252
+
+
+def _pack(role: str, expires_ns: Optional[int]) -> str:
+    return f"{role}|{expires_ns if expires_ns is not None else ''}"
+
+
+def _unpack(raw: str) -> tuple[str, Optional[int]]:
+    role, _, expires = raw.partition("|")
+    return role, int(expires) if expires else None
 
 
 class InvitationService:
     """Service for managing invitation codes."""
-    
-    # In production, these would be stored in a database
-    # For now, using a simple in-memory store with some predefined codes
+
+    # Seed codes, written into Redis on first lookup so every worker
+    # converges on the shared store; also the fallback if Redis is down
     VALID_CODES = {
         "CHEF2024": {"role": "chef", "expires": None},
         "FAMILY24": {"role": "family_member", "expires": None},
         "DEMO1234": {"role": "family_member", "expires": None},
         # Add more codes as needed
     }
-    
+
+    # Derived lookups kept in sync by add_invitation_code: role per code,
+    # and expiry as integer ns-since-epoch so the hot check is one
+    # time.time_ns() integer compare, no datetime construction
+    _CODE_ROLES = {code: info["role"] for code, info in VALID_CODES.items()}
+    _CODE_EXPIRES = {
+        code: int(info["expires"].timestamp() * 1_000_000_000)
+        for code, info in VALID_CODES.items()
+        if info["expires"]
+    }
+
+    _redis: Optional[redis.Redis] = None
+    _seeded = False
+    # code -> (checked_at, role, expires_ns or None); known codes only
+    _local_cache: dict[str, tuple[float, str, Optional[int]]] = {}
+
+    @classmethod
+    def _get_redis(cls) -> redis.Redis:
+        if cls._redis is None:
+            cls._redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return cls._redis
+
+    @classmethod
+    def _cache_put_local(cls, code: str, entry: tuple[float, str, Optional[int]]) -> None:
+        if len(cls._local_cache) >= _LOCAL_CACHE_MAX:
+            cls._local_cache.pop(next(iter(cls._local_cache)))
+        cls._local_cache[code] = entry
+
+    @classmethod
+    async def _lookup(cls, code: str) -> tuple[Optional[str], Optional[int]]:
+        """Resolve a code to (role, expires_ns) via the shared store.
+
+        Hits the in-process cache first so repeated signups don't pay a
+        Redis round-trip per attempt; falls back to the seed dicts when
+        Redis is unreachable so registration keeps working.
+        """
+        now = time.time()
+        cached = cls._local_cache.get(code)
+        if cached is not None and now - cached[0] < _LOCAL_TTL:
+            return cached[1], cached[2]
+
+        try:
+            r = cls._get_redis()
+            if not cls._seeded:
+                async with r.pipeline(transaction=False) as pipe:
+                    for seed, info in cls.VALID_CODES.items():
+                        expires = info["expires"]
+                        pipe.hsetnx(
+                            _HASH_KEY,
+                            seed,
+                            _pack(
+                                info["role"],
+                                int(expires.timestamp() * 1_000_000_000) if expires else None
+                            )
+                        )
+                    await pipe.execute()
+                cls._seeded = True
+            raw = await r.hget(_HASH_KEY, code)
+        except redis.RedisError:
+            return cls._CODE_ROLES.get(code), cls._CODE_EXPIRES.get(code)
+
+        role, expires_ns = _unpack(raw) if raw else (None, None)
+        # Only cache known codes: caching misses would let a stream of
+        # garbage codes grow the dict without bound
+        if role is not None:
+            cls._cache_put_local(code, (now, role, expires_ns))
+        return role, expires_ns
+
     @classmethod
     async def validate_invitation_code(
-        cls, 
-        code: str, 
+        cls,
+        code: str,
         db: AsyncSession
     ) -> tuple[bool, Optional[str], Optional[str]]:
         """
         Validate an invitation code.
-        
+
         Returns:
             tuple: (is_valid, role, error_message)
         """
-        code = code.upper().strip()
-        
-        # Check if code exists
-        if code not in cls.VALID_CODES:
+        code = code.strip()
+        # Most codes arrive already uppercase; skip the copy when they do
+        if not (code.isascii() and code.isupper()):
+            code = code.upper()
+
+        role, expires_ns = await cls._lookup(code)
+        if role is None:
             return False, None, "Invalid invitation code"
-        
-        code_info = cls.VALID_CODES[code]
-        
-        # Check if code has expired
-        if code_info["expires"]:
-            if datetime.utcnow() > code_info["expires"]:
-                return False, None, "This invitation code has expired"
-        
-        # Check if code has already been used (optional - for single-use codes)
-        # In production, you might want to track usage in the database
-        result = await db.execute(
-            select(User).where(User.invitation_code == code)
-        )
-        existing_users = result.scalars().all()
-        
-        # For demo purposes, allow multiple uses of the same code
-        # In production, you might want to limit this
-        # if len(existing_users) >= 1:
-        #     return False, None, "This invitation code has already been used"
-        
-        return True, code_info["role"], None
-    
+
+        if expires_ns is not None and time.time_ns() > expires_ns:
+            return False, None, "This invitation code has expired"
+
+        # Codes are multi-use, so there is nothing to look up; single-use
+        # enforcement would be a SELECT 1 ... LIMIT 1 against the partial
+        # invitation-code index, not a full-row fetch
+        return True, role, None
+
     @classmethod
     def generate_invitation_code(cls, length: int = 8) -> str:
-        """Generate a random invitation code."""
-        characters = string.ascii_uppercase + string.digits
-        return ''.join(secrets.choice(characters) for _ in range(length))
-    
+        """Generate a random invitation code.
+
+        One token_bytes draw covers the whole code instead of a rejection
+        sample through os.urandom per character.
+        """
+        out = bytearray()
+        while len(out) < length:
+            for b in secrets.token_bytes(length * 2):
+                if b < _REJECT_ABOVE:
+                    out.append(_ALPHABET[b % len(_ALPHABET)])
+                    if len(out) == length:
+                        break
+        return out.decode('ascii')
+
     @classmethod
-    def add_invitation_code(
-        cls, 
-        code: str, 
-        role: str, 
+    async def add_invitation_code(
+        cls,
+        code: str,
+        role: str,
         expires_in_days: Optional[int] = None
     ) -> None:
         """Add a new invitation code (for admin use)."""
         expires = None
         if expires_in_days:
             expires = datetime.utcnow() + timedelta(days=expires_in_days)
-        
-        cls.VALID_CODES[code.upper()] = {
+
+        code = code.upper()
+        expires_ns = int(expires.timestamp() * 1_000_000_000) if expires else None
+        cls.VALID_CODES[code] = {
             "role": role,
             "expires": expires
-        }
\ No newline at end of file
+        }
+        cls._CODE_ROLES[code] = role
+        if expires_ns is not None:
+            cls._CODE_EXPIRES[code] = expires_ns
+        else:
+            cls._CODE_EXPIRES.pop(code, None)
+        cls._cache_put_local(code, (time.time(), role, expires_ns))
+
+        try:
+            await cls._get_redis().hset(_HASH_KEY, code, _pack(role, expires_ns))
+        except redis.RedisError:
+            # Redis down: the code still works on this worker via the
+            # in-process dicts and will be re-written on the next add
+            pass
@@ -1,11 +1,19 @@
+from functools import lru_cache
+
 from app.core.config import settings
 from app.services.llm.anthropic_service import AnthropicService
 from app.services.llm.base import BaseLLMService
 from app.services.llm.openai_service import OpenAIService
 
 
+@lru_cache(maxsize=1)
 def get_llm_service() -> BaseLLMService:
-    """Factory function to get the appropriate LLM service based on configuration."""
+    """Return the process-wide LLM service singleton.
+
+    Each service owns an httpx connection pool; constructing one per call
+    would redo TCP/TLS setup per request instead of reusing warm
+    keep-alive connections.
+    """
     if settings.LLM_PROVIDER == "openai":
         return OpenAIService()
     elif settings.LLM_PROVIDER == "anthropic":
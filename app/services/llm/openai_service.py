@@ -1,20 +1,43 @@
-import json
-from typing import Any
+import asyncio
+import hashlib
+from functools import lru_cache
+from typing import Any, Final
 
 import openai
+import orjson
+import pypdfium2 as pdfium
 from openai import AsyncOpenAI
 
 from app.core.config import settings
 from app.services.llm.base import BaseLLMService
 
 
-class OpenAIService(BaseLLMService):
-    def __init__(self):
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.model = settings.LLM_MODEL
+@lru_cache(maxsize=8)
+def _cached_pdf_text(digest: bytes, pdf_content: bytes) -> str:
+    pdf = pdfium.PdfDocument(pdf_content)
+    try:
+        return "\n".join(
+            page.get_textpage().get_text_range() for page in pdf
+        )
+    finally:
+        pdf.close()
 
-    async def extract_recipe(self, pdf_content: bytes) -> dict[str, Any]:
-        system_prompt = """You are a recipe extraction expert. Extract recipe information from the provided text and return it as a JSON object.
+
+async def _pdf_text(pdf_content: bytes) -> str:
+    """Extract real text from PDF bytes, off the event loop.
+
+    The old pdf_content.decode('utf-8', errors='ignore') allocated a
+    file-sized string of mostly binary garbage; pdfium extracts the actual
+    text layer. Extraction runs in a thread (pdfium releases the GIL) and
+    is memoized per document so recipe + TOC passes parse once.
+    """
+    digest = hashlib.blake2b(pdf_content, digest_size=16).digest()
+    return await asyncio.to_thread(_cached_pdf_text, digest, pdf_content)
+
+
+# System prompts are static; build them once at import instead of
+# re-binding a large literal in every call frame
+_RECIPE_SYSTEM_PROMPT: Final[str] = """You are a recipe extraction expert. Extract recipe information from the provided text and return it as a JSON object.
 
 IMPORTANT: All ingredient quantities must be converted to single-serving amounts. If the recipe serves multiple people, divide all quantities by the number of servings.
 
@@ -44,14 +67,49 @@ Example transformation:
 - Single serving: "1/2 cup flour"
 """
 
+_TOC_SYSTEM_PROMPT: Final[str] = """You are an expert at finding and extracting table of contents from recipe books.
+        
+Look for the table of contents and return a JSON object mapping recipe names to their page numbers.
+
+Example output:
+{
+    "Spaghetti Carbonara": "65-67",
+    "Chicken Parmesan": "81",
+    "Caesar Salad": "23"
+}
+
+If no table of contents is found, return: {"error": "No table of contents found"}
+"""
+
+_NUTRITION_SYSTEM_PROMPT: Final[str] = """You are a nutrition expert. Calculate the nutritional information for the given ingredients.
+
+Return the data in this JSON format:
+{
+    "caloriesPerServing": "integer",
+    "macroNutrients": {
+        "protein_g": "integer",
+        "fat_g": "integer",
+        "carbohydrates_g": "integer"
+    }
+}
+
+Provide reasonable estimates based on common nutritional values. The values should be per single serving.
+"""
+
+
+class OpenAIService(BaseLLMService):
+    def __init__(self):
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.model = settings.LLM_MODEL
+
+    async def extract_recipe(self, pdf_content: bytes) -> dict[str, Any]:
         try:
-            # Convert PDF content to text (simplified - in production use proper PDF parsing)
-            text_content = pdf_content.decode('utf-8', errors='ignore')
+            text_content = await _pdf_text(pdf_content)
             
             response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": _RECIPE_SYSTEM_PROMPT},
                     {"role": "user", "content": f"Extract recipe from this text:\n\n{text_content}"}
                 ],
                 response_format={"type": "json_object"},
@@ -59,7 +117,7 @@ Example transformation:
                 max_tokens=2000
             )
 
-            result = json.loads(response.choices[0].message.content)
+            result = orjson.loads(response.choices[0].message.content)
             
             if "error" in result:
                 raise ValueError(result["error"])
@@ -70,27 +128,13 @@ Example transformation:
             raise Exception(f"Failed to extract recipe: {str(e)}")
 
     async def extract_table_of_contents(self, pdf_content: bytes) -> dict[str, str]:
-        system_prompt = """You are an expert at finding and extracting table of contents from recipe books.
-        
-Look for the table of contents and return a JSON object mapping recipe names to their page numbers.
-
-Example output:
-{
-    "Spaghetti Carbonara": "65-67",
-    "Chicken Parmesan": "81",
-    "Caesar Salad": "23"
-}
-
-If no table of contents is found, return: {"error": "No table of contents found"}
-"""
-
         try:
-            text_content = pdf_content.decode('utf-8', errors='ignore')
+            text_content = await _pdf_text(pdf_content)
             
             response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": _TOC_SYSTEM_PROMPT},
                     {"role": "user", "content": f"Extract table of contents from this text:\n\n{text_content}"}
                 ],
                 response_format={"type": "json_object"},
@@ -98,7 +142,7 @@ If no table of contents is found, return: {"error": "No table of contents found"
                 max_tokens=2000
             )
 
-            result = json.loads(response.choices[0].message.content)
+            result = orjson.loads(response.choices[0].message.content)
             
             if "error" in result:
                 raise ValueError(result["error"])
@@ -109,28 +153,13 @@ If no table of contents is found, return: {"error": "No table of contents found"
             raise Exception(f"Failed to extract table of contents: {str(e)}")
 
     async def calculate_nutrition(self, ingredients: list[str], servings: int) -> dict[str, Any]:
-        system_prompt = """You are a nutrition expert. Calculate the nutritional information for the given ingredients.
-
-Return the data in this JSON format:
-{
-    "caloriesPerServing": "integer",
-    "macroNutrients": {
-        "protein_g": "integer",
-        "fat_g": "integer",
-        "carbohydrates_g": "integer"
-    }
-}
-
-Provide reasonable estimates based on common nutritional values. The values should be per single serving.
-"""
-
         try:
             ingredients_text = "\n".join(ingredients)
             
             response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=[
-                    {"role": "system", "content": system_prompt},
+                    {"role": "system", "content": _NUTRITION_SYSTEM_PROMPT},
                     {"role": "user", "content": f"Calculate nutrition for these ingredients (serves {servings}):\n\n{ingredients_text}"}
                 ],
                 response_format={"type": "json_object"},
@@ -138,7 +167,7 @@ Provide reasonable estimates based on common nutritional values. The values shou
                 max_tokens=500
             )
 
-            result = json.loads(response.choices[0].message.content)
+            result = orjson.loads(response.choices[0].message.content)
             return result
 
         except Exception as e:
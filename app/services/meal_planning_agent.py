@@ -1,11 +1,16 @@
+import hashlib
 import json
 import logging
+import re
+from collections import deque
 from datetime import date, timedelta
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from sqlalchemy import select
+import redis.asyncio as redis
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.schemas.recipe import RecipeSearch
 from app.database.models import MealPlan, MealPlanStatus, MealType, Recipe, User
 from app.services.llm.factory import get_llm_service
@@ -13,14 +18,148 @@ from app.services.recipe_service import RecipeService
 
 logger = logging.getLogger(__name__)
 
+# Identical (duration, goals, habits) payloads produce the same plan
+# structure at temperature 0.1, so repeat planners can skip the LLM call
+_STRUCTURE_CACHE_PREFIX = "cheflink:plan-structure:"
+_ANALYSIS_CACHE_PREFIX = "cheflink:plan-modification:"
+_CACHE_TTL = 24 * 3600
+_LOCAL_CACHE_MAX = 256
+
+# Forced tool calls return schema-conforming dicts directly, so no
+# JSON-substring scraping of free text and no parse-failure retries
+_MEAL_SLOT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "calories": {"type": "integer"},
+        "protein_g": {"type": "integer"}
+    },
+    "required": ["calories", "protein_g"]
+}
+
+_STRUCTURE_TOOL = {
+    "name": "return_meal_plan_structure",
+    "description": "Return the daily meal plan structure.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "daily_meals": {
+                "type": "object",
+                "properties": {
+                    "breakfast": _MEAL_SLOT_SCHEMA,
+                    "lunch": _MEAL_SLOT_SCHEMA,
+                    "dinner": _MEAL_SLOT_SCHEMA,
+                    "snack": _MEAL_SLOT_SCHEMA
+                }
+            },
+            "total_daily": {
+                "type": "object",
+                "properties": {
+                    "calories": {"type": "integer"},
+                    "protein_g": {"type": "integer"},
+                    "fat_g": {"type": "integer"},
+                    "carbohydrates_g": {"type": "integer"}
+                }
+            }
+        },
+        "required": ["daily_meals", "total_daily"]
+    }
+}
+
+_MODIFICATION_TOOL = {
+    "name": "return_meal_plan_modification",
+    "description": "Return the parsed meal plan modification request.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "action": {"type": "string", "enum": ["swap", "remove", "add"]},
+            "target": {
+                "type": "object",
+                "properties": {
+                    "date": {"type": "string"},
+                    "meal_type": {
+                        "type": "string",
+                        "enum": ["breakfast", "lunch", "dinner", "snack"]
+                    }
+                },
+                "required": ["date", "meal_type"]
+            },
+            "constraints": {
+                "type": "object",
+                "properties": {
+                    "calories_max": {"type": ["integer", "null"]},
+                    "protein_min": {"type": ["integer", "null"]},
+                    "main_protein": {"type": ["string", "null"]},
+                    "exclude_ingredients": {
+                        "type": "array", "items": {"type": "string"}
+                    }
+                }
+            }
+        },
+        "required": ["action", "target"]
+    }
+}
+
+
+def _tool_input(response) -> Dict[str, Any]:
+    """Return the input dict of the forced tool call in a response."""
+    for block in response.content:
+        if block.type == "tool_use":
+            return block.input
+    raise ValueError("No tool_use block in response")
+
 
 class MealPlanningAgent:
     """AI agent for intelligent meal planning."""
-    
+
+    _redis: Optional[redis.Redis] = None
+    # In-process fallback when Redis is unavailable; bounded FIFO
+    _local_cache: dict[str, Dict[str, Any]] = {}
+
     def __init__(self, db: AsyncSession):
         self.db = db
         self.llm_service = get_llm_service()
         self.recipe_service = RecipeService(db)
+
+    @classmethod
+    def _get_redis(cls) -> redis.Redis:
+        if cls._redis is None:
+            cls._redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        return cls._redis
+
+    @classmethod
+    def _cache_key(cls, prefix: str, payload: Any) -> str:
+        serialized = json.dumps(payload, sort_keys=True, default=str)
+        return prefix + hashlib.blake2b(serialized.encode()).hexdigest()
+
+    @classmethod
+    def _cache_put_local(cls, key: str, value: Dict[str, Any]) -> None:
+        if len(cls._local_cache) >= _LOCAL_CACHE_MAX:
+            cls._local_cache.pop(next(iter(cls._local_cache)))
+        cls._local_cache[key] = value
+
+    @classmethod
+    async def _cache_get(cls, key: str) -> Optional[Dict[str, Any]]:
+        cached = cls._local_cache.get(key)
+        if cached is not None:
+            return cached
+        try:
+            raw = await cls._get_redis().get(key)
+        except redis.RedisError:
+            return None
+        if raw is None:
+            return None
+        value = json.loads(raw)
+        cls._cache_put_local(key, value)
+        return value
+
+    @classmethod
+    async def _cache_set(cls, key: str, value: Dict[str, Any]) -> None:
+        cls._cache_put_local(key, value)
+        try:
+            await cls._get_redis().set(key, json.dumps(value), ex=_CACHE_TTL)
+        except redis.RedisError:
+            # Redis down: the in-process copy still serves this worker
+            pass
         
     async def create_meal_plan(
         self,
@@ -37,35 +176,71 @@ class MealPlanningAgent:
         )
         
         # Step 2: Search and assign recipes for each meal slot
-        meal_plans = []
+        rows: List[Dict[str, Any]] = []
         start_date = date.today()
-        
+
+        # Load every locked date in the window with one query instead of
+        # a SELECT per day
+        locked_dates = await self._get_locked_dates(
+            start_date, start_date + timedelta(days=duration_days)
+        )
+
+        # One randomized candidate search per distinct meal type; slot
+        # assignment then runs in Python instead of querying per slot
+        candidate_pools = await self._fetch_candidate_pools(
+            plan_structure['daily_meals'], duration_days
+        )
+
+        # One compiled alternation instead of a substring scan per
+        # (recipe, blacklist entry) pair on every slot
+        blacklist = dietary_goals.get('blacklisted_ingredients', [])
+        blacklist_re = (
+            re.compile('|'.join(map(re.escape, blacklist)), re.IGNORECASE)
+            if blacklist else None
+        )
+        joined_ingredients: Dict[Any, str] = {}
+
+        # Last 7 assigned recipe ids, maintained incrementally rather
+        # than rebuilt from the plan list on every slot
+        recent_ids: deque = deque(maxlen=7)
+        recent_id_set: set = set()
+
         for day_offset in range(duration_days):
             current_date = start_date + timedelta(days=day_offset)
-            
+
             # Check if plans for this date are already locked
-            if await self._is_date_locked(current_date):
+            if current_date in locked_dates:
                 continue
-                
+
             for meal_type, requirements in plan_structure['daily_meals'].items():
-                # Search for appropriate recipe
-                recipe = await self._find_recipe_for_slot(
-                    requirements,
-                    dietary_goals.get('blacklisted_ingredients', []),
-                    meal_plans  # Pass existing plans to avoid repetition
+                # Pick an appropriate recipe from the prefetched pool
+                recipe = self._pick_recipe_for_slot(
+                    candidate_pools.get(meal_type, deque()),
+                    blacklist_re,
+                    recent_id_set,
+                    joined_ingredients
                 )
-                
+
                 if recipe:
-                    meal_plan = MealPlan(
-                        user_id=user.id,
-                        date=current_date,
-                        meal_type=MealType(meal_type.lower()),
-                        recipe_id=recipe.id,
-                        status=MealPlanStatus.UNLOCKED
-                    )
-                    self.db.add(meal_plan)
-                    meal_plans.append(meal_plan)
-                    
+                    rows.append({
+                        "user_id": user.id,
+                        "date": current_date,
+                        "meal_type": MealType(meal_type.lower()),
+                        "recipe_id": recipe.id,
+                        "status": MealPlanStatus.UNLOCKED
+                    })
+                    if len(recent_ids) == recent_ids.maxlen:
+                        recent_id_set.discard(recent_ids[0])
+                    recent_ids.append(recipe.id)
+                    recent_id_set.add(recipe.id)
+
+        if not rows:
+            return []
+
+        # One multi-row INSERT ... RETURNING instead of a flush that
+        # emits a statement per slot
+        result = await self.db.execute(insert(MealPlan).returning(MealPlan), rows)
+        meal_plans = list(result.scalars().all())
         await self.db.commit()
         return meal_plans
         
@@ -76,44 +251,46 @@ class MealPlanningAgent:
     ) -> Dict[str, Any]:
         """Modify existing meal plan based on user request."""
         
-        # Use Claude to understand the modification request
-        system_prompt = """You are a meal planning assistant. Analyze the user's modification request and return a JSON object with the following structure:
-{
-    "action": "swap|remove|add",
-    "target": {
-        "date": "YYYY-MM-DD or relative date",
-        "meal_type": "breakfast|lunch|dinner|snack"
-    },
-    "constraints": {
-        "calories_max": int or null,
-        "protein_min": int or null,
-        "main_protein": "string or null",
-        "exclude_ingredients": []
-    }
-}
-"""
+        # Use Claude to understand the modification request; the forced
+        # tool call carries the output structure
+        system_prompt = """You are a meal planning assistant. Analyze the user's modification request and report it via the return_meal_plan_modification tool. Dates may be relative ("today", "tomorrow") or YYYY-MM-DD."""
 
         try:
-            response = await self.llm_service.client.messages.create(
-                model=self.llm_service.model,
-                max_tokens=1000,
-                temperature=0.1,
-                system=system_prompt,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": f"Analyze this meal plan modification request: {modification_request}"
-                    }
-                ],
-                thinking={
-                    "type": "enabled",
-                    "budget_tokens": 4000
-                }
+            # Identical requests parse to the same action; skip the LLM
+            # on a hit (the modification itself is never cached). The
+            # key includes today's date because relative phrasing like
+            # "move tomorrow's dinner" resolves to a different concrete
+            # date each day — yesterday's parse must not be reused.
+            cache_key = self._cache_key(
+                _ANALYSIS_CACHE_PREFIX,
+                [date.today().isoformat(), modification_request.strip().lower()],
             )
-            
-            # Parse Claude's response
-            modification_data = json.loads(response.content[0].text)
-            
+            modification_data = await self._cache_get(cache_key)
+
+            if modification_data is None:
+                response = await self.llm_service.client.messages.create(
+                    model=self.llm_service.model,
+                    max_tokens=300,
+                    temperature=0.1,
+                    # Static prefix: cached reads cost ~10% of input price
+                    system=[{
+                        "type": "text",
+                        "text": system_prompt,
+                        "cache_control": {"type": "ephemeral"}
+                    }],
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": f"Analyze this meal plan modification request: {modification_request}"
+                        }
+                    ],
+                    tools=[_MODIFICATION_TOOL],
+                    tool_choice={"type": "tool", "name": "return_meal_plan_modification"}
+                )
+
+                modification_data = _tool_input(response)
+                await self._cache_set(cache_key, modification_data)
+
             # Execute the modification
             result = await self._execute_modification(user, modification_data)
             return result
@@ -130,26 +307,7 @@ class MealPlanningAgent:
     ) -> Dict[str, Any]:
         """Create high-level meal plan structure."""
         
-        system_prompt = """You are a nutrition expert. Create a daily meal plan structure based on the user's requirements.
-
-Return a JSON object with this structure:
-{
-    "daily_meals": {
-        "breakfast": {"calories": int, "protein_g": int},
-        "lunch": {"calories": int, "protein_g": int},
-        "dinner": {"calories": int, "protein_g": int},
-        "snack": {"calories": int, "protein_g": int}  // optional
-    },
-    "total_daily": {
-        "calories": int,
-        "protein_g": int,
-        "fat_g": int,
-        "carbohydrates_g": int
-    }
-}
-
-The sum of meal calories should equal the daily target. Remove snack if user prefers 3 meals.
-"""
+        system_prompt = """You are a nutrition expert. Create a daily meal plan structure based on the user's requirements and report it via the return_meal_plan_structure tool. The sum of meal calories should equal the daily target. Omit snack if the user prefers 3 meals."""
 
         prompt = f"""Create a meal plan structure for:
 Duration: {duration_days} days
@@ -157,28 +315,36 @@ Dietary Goals: {json.dumps(dietary_goals)}
 Eating Habits: {json.dumps(eating_habits)}
 """
 
+        cache_key = self._cache_key(
+            _STRUCTURE_CACHE_PREFIX, [duration_days, dietary_goals, eating_habits]
+        )
+        cached = await self._cache_get(cache_key)
+        if cached is not None:
+            return cached
+
         try:
             response = await self.llm_service.client.messages.create(
                 model=self.llm_service.model,
-                max_tokens=1000,
+                max_tokens=500,
                 temperature=0.1,
-                system=system_prompt,
+                # Static prefix: cached reads cost ~10% of input price
+                system=[{
+                    "type": "text",
+                    "text": system_prompt,
+                    "cache_control": {"type": "ephemeral"}
+                }],
                 messages=[
                     {"role": "user", "content": prompt}
                 ],
-                thinking={
-                    "type": "enabled",
-                    "budget_tokens": 6000
-                }
+                tools=[_STRUCTURE_TOOL],
+                tool_choice={"type": "tool", "name": "return_meal_plan_structure"}
             )
-            
-            # Extract JSON from response
-            response_text = response.content[0].text
-            start = response_text.find('{')
-            end = response_text.rfind('}') + 1
-            json_str = response_text[start:end]
-            
-            return json.loads(json_str)
+
+            structure = _tool_input(response)
+            # Only successful responses are cached; the default fallback
+            # below should be retried next call
+            await self._cache_set(cache_key, structure)
+            return structure
             
         except Exception as e:
             logger.error(f"Error creating plan structure: {str(e)}")
@@ -197,50 +363,72 @@ Eating Habits: {json.dumps(eating_habits)}
                 }
             }
             
-    async def _find_recipe_for_slot(
+    async def _fetch_candidate_pools(
+        self,
+        daily_meals: Dict[str, Dict[str, Any]],
+        duration_days: int
+    ) -> Dict[str, deque]:
+        """Prefetch a randomized candidate pool per meal type.
+
+        A 7-day, 4-meal plan previously issued 28 slot searches; one
+        larger search per distinct meal type serves the whole plan. The
+        pools are deques so slot assignment can rotate through them.
+        """
+        pools: Dict[str, deque] = {}
+        for meal_type, requirements in daily_meals.items():
+            search_params = RecipeSearch(
+                calories_min=int(requirements['calories'] * 0.8),
+                calories_max=int(requirements['calories'] * 1.2),
+                protein_min=int(requirements.get('protein_g', 0) * 0.8),
+                randomize=True,
+                limit=duration_days * 5
+            )
+            pools[meal_type] = deque(
+                await self.recipe_service.search_recipes(search_params)
+            )
+        return pools
+
+    def _pick_recipe_for_slot(
         self,
-        requirements: Dict[str, Any],
-        blacklisted_ingredients: List[str],
-        existing_plans: List[MealPlan]
+        candidates: deque,
+        blacklist_re: Optional[re.Pattern],
+        recent_recipe_ids: set,
+        joined_ingredients: Dict[Any, str]
     ) -> Recipe | None:
-        """Find appropriate recipe for a meal slot."""
-        
-        # Create search parameters based on requirements
-        search_params = RecipeSearch(
-            calories_min=int(requirements['calories'] * 0.8),
-            calories_max=int(requirements['calories'] * 1.2),
-            protein_min=int(requirements.get('protein_g', 0) * 0.8),
-            randomize=True,
-            limit=10
-        )
-        
-        recipes = await self.recipe_service.search_recipes(search_params)
-        
-        # Filter out recipes with blacklisted ingredients
-        if blacklisted_ingredients:
-            recipes = [
-                r for r in recipes
-                if not any(
-                    blacklist.lower() in ' '.join(r.ingredients).lower()
-                    for blacklist in blacklisted_ingredients
-                )
-            ]
-            
-        # Avoid recipes already in recent plans
-        recent_recipe_ids = {p.recipe_id for p in existing_plans[-7:]}
-        recipes = [r for r in recipes if r.id not in recent_recipe_ids]
-        
-        return recipes[0] if recipes else None
+        """Pick the next suitable recipe, rotating through the pool.
+
+        Every examined candidate rotates to the back of the deque so the
+        next slot continues where this one stopped; a front-first scan
+        would replay the pool head as soon as the recent-use window ages
+        out, collapsing variety across the plan. joined_ingredients
+        memoizes the flattened ingredient text per recipe id so repeated
+        slots don't rebuild the same string.
+        """
+        for _ in range(len(candidates)):
+            recipe = candidates[0]
+            candidates.rotate(-1)
+            if recipe.id in recent_recipe_ids:
+                continue
+            if blacklist_re is not None:
+                joined = joined_ingredients.get(recipe.id)
+                if joined is None:
+                    joined = ' '.join(recipe.ingredients)
+                    joined_ingredients[recipe.id] = joined
+                if blacklist_re.search(joined):
+                    continue
+            return recipe
+        return None
         
-    async def _is_date_locked(self, check_date: date) -> bool:
-        """Check if meal plans for a date are locked."""
+    async def _get_locked_dates(self, start: date, end: date) -> set[date]:
+        """Fetch the distinct locked dates in [start, end)."""
         result = await self.db.execute(
-            select(MealPlan)
-            .where(MealPlan.date == check_date)
+            select(MealPlan.date)
+            .where(MealPlan.date >= start)
+            .where(MealPlan.date < end)
             .where(MealPlan.status == MealPlanStatus.LOCKED)
-            .limit(1)
+            .distinct()
         )
-        return result.scalar_one_or_none() is not None
+        return set(result.scalars())
         
     async def _execute_modification(
         self,
@@ -257,20 +445,6 @@ Eating Habits: {json.dumps(eating_habits)}
         meal_type = MealType(target['meal_type'])
         
         if action == 'swap':
-            # Find and replace the meal
-            result = await self.db.execute(
-                select(MealPlan)
-                .where(MealPlan.user_id == user.id)
-                .where(MealPlan.date == target_date)
-                .where(MealPlan.meal_type == meal_type)
-                .where(MealPlan.status == MealPlanStatus.UNLOCKED)
-            )
-            
-            meal_plan = result.scalar_one_or_none()
-            
-            if not meal_plan:
-                return {"success": False, "error": "Meal plan not found or is locked"}
-                
             # Find new recipe
             constraints = modification_data.get('constraints', {})
             search_params = RecipeSearch(
@@ -280,16 +454,29 @@ Eating Habits: {json.dumps(eating_habits)}
                 randomize=True,
                 limit=5
             )
-            
+
             recipes = await self.recipe_service.search_recipes(search_params)
-            
+
             if not recipes:
                 return {"success": False, "error": "No suitable recipes found"}
-                
-            # Update meal plan
-            meal_plan.recipe_id = recipes[0].id
+
+            # Replace the meal in one UPDATE ... RETURNING round-trip
+            # instead of SELECT + flush, with no ORM hydration
+            result = await self.db.execute(
+                update(MealPlan)
+                .where(MealPlan.user_id == user.id)
+                .where(MealPlan.date == target_date)
+                .where(MealPlan.meal_type == meal_type)
+                .where(MealPlan.status == MealPlanStatus.UNLOCKED)
+                .values(recipe_id=recipes[0].id)
+                .returning(MealPlan.id)
+            )
+
+            if result.first() is None:
+                return {"success": False, "error": "Meal plan not found or is locked"}
+
             await self.db.commit()
-            
+
             return {
                 "success": True,
                 "new_recipe": recipes[0].recipe_name,
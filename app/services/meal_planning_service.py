@@ -1,11 +1,15 @@
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from datetime import date, timedelta
+from uuid import UUID
 import random
 
-from sqlalchemy import select
+import numpy as np
+
+from sqlalchemy import Text, cast, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from app.database.models import Recipe, MealType, User
+from app.database.models import MealPlan, Recipe, MealType, User
 from app.services.recipe_service import RecipeService
 
 
@@ -20,9 +24,34 @@ class MealPlanningService:
         MealType.SNACK: 0.05        # 5% of daily calories
     }
     
-    def __init__(self, db: AsyncSession):
+    def __init__(self, db: AsyncSession, recipe_service: Optional[RecipeService] = None):
         self.db = db
-        self.recipe_service = RecipeService(db)
+        self.recipe_service = recipe_service or RecipeService(db)
+
+    async def get_user_meal_plans(
+        self,
+        user_id: UUID,
+        start_date: date,
+        end_date: date
+    ) -> List[MealPlan]:
+        """Get a user's meal plans in a date range, recipes eager-loaded.
+
+        selectinload fetches all referenced recipes in a single IN-query so
+        callers can touch plan.recipe without per-row lazy SELECTs (which
+        async SQLAlchemy would reject anyway).
+        """
+        stmt = (
+            select(MealPlan)
+            .options(selectinload(MealPlan.recipe))
+            .where(
+                MealPlan.user_id == user_id,
+                MealPlan.date >= start_date,
+                MealPlan.date <= end_date
+            )
+            .order_by(MealPlan.date, MealPlan.meal_type)
+        )
+        result = await self.db.execute(stmt)
+        return result.scalars().all()
     
     async def create_intelligent_meal_plan(
         self,
@@ -48,14 +77,22 @@ class MealPlanningService:
         # Calculate per-meal targets
         meal_targets = self._calculate_meal_targets(calorie_target, macro_targets, include_snacks)
         
-        # Get all suitable recipes
-        suitable_recipes = await self._get_suitable_recipes(restrictions, allergies, dislikes)
-        
-        # Group recipes by meal type suitability
-        breakfast_recipes = [r for r in suitable_recipes if self._is_breakfast_suitable(r)]
-        lunch_recipes = [r for r in suitable_recipes if self._is_lunch_suitable(r)]
-        dinner_recipes = [r for r in suitable_recipes if self._is_dinner_suitable(r)]
-        snack_recipes = [r for r in suitable_recipes if self._is_snack_suitable(r)]
+        # Stream suitable recipes straight into the per-meal pools
+        # (suitability precomputed at ingest); no intermediate list of
+        # the whole filtered table
+        breakfast_recipes: List[Recipe] = []
+        lunch_recipes: List[Recipe] = []
+        dinner_recipes: List[Recipe] = []
+        snack_recipes: List[Recipe] = []
+        async for recipe in self._get_suitable_recipes(restrictions, allergies, dislikes):
+            if MealType.BREAKFAST.value in recipe.suitable_meal_types:
+                breakfast_recipes.append(recipe)
+            if MealType.LUNCH.value in recipe.suitable_meal_types:
+                lunch_recipes.append(recipe)
+            if MealType.DINNER.value in recipe.suitable_meal_types:
+                dinner_recipes.append(recipe)
+            if MealType.SNACK.value in recipe.suitable_meal_types:
+                snack_recipes.append(recipe)
         
         # Plan meals for each day
         meal_plans = []
@@ -80,7 +117,7 @@ class MealPlanningService:
                     recipe_pool = snack_recipes
                 
                 # Find best matching recipe
-                recipe = await self._select_best_recipe(
+                recipe = self._select_best_recipe(
                     recipe_pool,
                     targets,
                     recent_proteins,
@@ -134,98 +171,88 @@ class MealPlanningService:
         
         return targets
     
+    # Keyword lists per dietary restriction; substring semantics match
+    # the old in-Python scan
+    RESTRICTION_KEYWORDS = {
+        "vegetarian": ["chicken", "beef", "pork", "fish", "salmon", "tuna", "shrimp"],
+        "vegan": ["chicken", "beef", "pork", "fish", "egg", "milk", "cheese", "butter", "cream"],
+        "gluten-free": ["wheat", "flour", "bread", "pasta", "noodles"],
+    }
+
+    @staticmethod
+    def _like_term(term: str) -> str:
+        """Build a %-wrapped LIKE pattern with user wildcards escaped.
+
+        Allergy/dislike strings come straight from user preferences, so
+        literal % and _ must not act as wildcards in the NOT LIKE
+        predicates (paired with escape='\\\\' at the call sites).
+        """
+        escaped = (
+            term.lower()
+            .replace("\\", "\\\\")
+            .replace("%", "\\%")
+            .replace("_", "\\_")
+        )
+        return f"%{escaped}%"
+
     async def _get_suitable_recipes(
         self,
         restrictions: List[str],
         allergies: List[str],
         dislikes: List[str]
-    ) -> List[Recipe]:
-        """Get all recipes that match user's dietary restrictions."""
+    ) -> AsyncIterator[Recipe]:
+        """Stream all recipes that match user's dietary restrictions.
+
+        The restriction/allergy/dislike checks run as SQL predicates so
+        only matching rows cross the wire. The query is unbounded, so
+        rows come off a server-side cursor in yield_per batches instead
+        of one all() materialization.
+        """
         query = select(Recipe)
-        
-        # For now, get all recipes and filter in memory
-        # In production, this would use more sophisticated filtering
-        result = await self.db.execute(query)
-        all_recipes = result.scalars().all()
-        
-        suitable_recipes = []
-        for recipe in all_recipes:
-            # Check restrictions (simplified - in production would parse ingredients)
-            if self._matches_restrictions(recipe, restrictions, allergies, dislikes):
-                suitable_recipes.append(recipe)
-        
-        return suitable_recipes
-    
-    def _matches_restrictions(
-        self,
-        recipe: Recipe,
-        restrictions: List[str],
-        allergies: List[str],
-        dislikes: List[str]
-    ) -> bool:
-        """Check if recipe matches dietary restrictions."""
-        # Simplified implementation - in production would use NLP to analyze ingredients
-        ingredients_text = " ".join(recipe.ingredients).lower()
-        
-        # Check allergies (strict)
+
+        ingredients_text = func.lower(cast(Recipe.ingredients, Text))
+        name_lower = func.lower(Recipe.recipe_name)
+        protein_text = func.lower(cast(Recipe.main_protein, Text))
+
+        # Allergies (strict): no blacklisted ingredient anywhere
         for allergy in allergies:
-            if allergy.lower() in ingredients_text:
-                return False
-        
-        # Check dislikes (strict for main ingredients)
+            query = query.where(
+                ingredients_text.notlike(self._like_term(allergy), escape='\\')
+            )
+
+        # Dislikes (strict for main ingredients)
         for dislike in dislikes:
-            if dislike.lower() in recipe.recipe_name.lower():
-                return False
-            # Check if it's a main protein
-            if any(dislike.lower() in protein.lower() for protein in recipe.main_protein):
-                return False
-        
-        # Check dietary restrictions (simplified)
-        if "vegetarian" in restrictions:
-            meat_keywords = ["chicken", "beef", "pork", "fish", "salmon", "tuna", "shrimp"]
-            if any(keyword in ingredients_text for keyword in meat_keywords):
-                return False
-        
-        if "vegan" in restrictions:
-            animal_keywords = ["chicken", "beef", "pork", "fish", "egg", "milk", "cheese", "butter", "cream"]
-            if any(keyword in ingredients_text for keyword in animal_keywords):
-                return False
-        
-        if "gluten-free" in restrictions:
-            gluten_keywords = ["wheat", "flour", "bread", "pasta", "noodles"]
-            if any(keyword in ingredients_text for keyword in gluten_keywords):
-                return False
-        
-        return True
-    
-    def _is_breakfast_suitable(self, recipe: Recipe) -> bool:
-        """Check if recipe is suitable for breakfast."""
-        breakfast_keywords = ["egg", "oatmeal", "pancake", "waffle", "cereal", "toast", "smoothie", "yogurt"]
-        name_lower = recipe.recipe_name.lower()
-        return any(keyword in name_lower for keyword in breakfast_keywords) or recipe.calories_per_serving < 600
-    
-    def _is_lunch_suitable(self, recipe: Recipe) -> bool:
-        """Check if recipe is suitable for lunch."""
-        # Most recipes are suitable for lunch
-        return 400 <= recipe.calories_per_serving <= 800
-    
-    def _is_dinner_suitable(self, recipe: Recipe) -> bool:
-        """Check if recipe is suitable for dinner."""
-        # Most recipes are suitable for dinner
-        return 500 <= recipe.calories_per_serving <= 900
-    
-    def _is_snack_suitable(self, recipe: Recipe) -> bool:
-        """Check if recipe is suitable as a snack."""
-        return recipe.calories_per_serving < 300
-    
-    async def _select_best_recipe(
+            term = self._like_term(dislike)
+            query = query.where(name_lower.notlike(term, escape='\\'))
+            query = query.where(protein_text.notlike(term, escape='\\'))
+
+        # Dietary restrictions (keyword heuristics, same as before)
+        for restriction in restrictions:
+            for keyword in self.RESTRICTION_KEYWORDS.get(restriction, []):
+                query = query.where(
+                    ingredients_text.notlike(self._like_term(keyword), escape='\\')
+                )
+
+        result = await self.db.stream_scalars(
+            query.execution_options(yield_per=100)
+        )
+        async for recipe in result:
+            yield recipe
+
+
+    def _select_best_recipe(
         self,
         recipe_pool: List[Recipe],
         targets: Dict[str, int],
         recent_proteins: List[str],
         meal_type: MealType
     ) -> Optional[Recipe]:
-        """Select the best matching recipe for the given targets."""
+        """Select the best matching recipe for the given targets.
+
+        Pure CPU over the prefetched pool — the day loop issues no I/O,
+        so selection stays synchronous rather than pretending to be
+        awaitable.
+        """
         if not recipe_pool:
             return None
         
@@ -240,29 +267,23 @@ class MealPlanningService:
             if filtered_pool:
                 recipe_pool = filtered_pool
         
-        # Score recipes based on nutritional match
-        scored_recipes = []
-        for recipe in recipe_pool:
-            score = self._calculate_recipe_score(recipe, targets)
-            scored_recipes.append((score, recipe))
-        
-        # Sort by score (lower is better)
-        scored_recipes.sort(key=lambda x: x[0])
-        
-        # Add some randomness - pick from top 5 matches
-        top_matches = scored_recipes[:5]
-        if top_matches:
-            return random.choice(top_matches)[1]
-        
-        return None
-    
-    def _calculate_recipe_score(self, recipe: Recipe, targets: Dict[str, int]) -> float:
-        """Calculate how well a recipe matches the nutritional targets."""
-        # Calculate percentage differences for each metric
-        calorie_diff = abs(recipe.calories_per_serving - targets["calories"]) / targets["calories"]
-        protein_diff = abs(recipe.macro_nutrients.get("protein_g", 0) - targets["protein_g"]) / targets["protein_g"]
-        
-        # Weight calories more heavily
-        score = (calorie_diff * 2) + protein_diff
-        
-        return score
\ No newline at end of file
+        # Score the whole pool in one vectorized pass: percentage
+        # difference per metric, calories weighted more heavily
+        count = len(recipe_pool)
+        calories = np.fromiter(
+            (r.calories_per_serving for r in recipe_pool), dtype=float, count=count
+        )
+        protein = np.fromiter(
+            (r.macro_nutrients.get("protein_g", 0) for r in recipe_pool),
+            dtype=float, count=count
+        )
+        scores = (
+            np.abs(calories - targets["calories"]) / targets["calories"] * 2
+            + np.abs(protein - targets["protein_g"]) / targets["protein_g"]
+        )
+
+        # Add some randomness - pick from top 5 matches (lower is
+        # better); argpartition finds them without a full sort
+        k = min(5, count)
+        top_matches = np.argpartition(scores, k - 1)[:k]
+        return recipe_pool[int(random.choice(top_matches))]
\ No newline at end of file
@@ -1,78 +1,190 @@
+import asyncio
 import io
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-import PyPDF2
-from PyPDF2 import PdfReader, PdfWriter
+import pypdfium2 as pdfium
 
+# Below this many pages the pool spawn costs more than it saves
+_PARALLEL_PAGE_THRESHOLD = 16
+
+# Any whitespace run containing a line break collapses to a single
+# newline; PDFium emits \r\n inside pages
+_CLEAN_RE = re.compile(r'[ \t]*[\r\n][ \t\r\n]*')
+
+# Per-worker document handle, parsed once per process by _init_worker
+_worker_pdf: pdfium.PdfDocument | None = None
+
+
+def _init_worker(pdf_content: bytes) -> None:
+    global _worker_pdf
+    _worker_pdf = pdfium.PdfDocument(pdf_content)
+
+
+def _extract_page_text(page_num: int) -> str:
+    return _worker_pdf[page_num].get_textpage().get_text_range() or ""
+
+
+def _crop_pages(start_page: int, end_page: int) -> bytes:
+    """Copy a 0-indexed page range out of the per-worker document."""
+    dst = pdfium.PdfDocument.new()
+    try:
+        dst.import_pages(_worker_pdf, pages=list(range(start_page, end_page)))
+        output = io.BytesIO()
+        dst.save(output)
+        return output.getvalue()
+    finally:
+        dst.close()
+
+
+class PDFDocument:
+    """A PDF parsed once and reused across page-count/text/crop calls.
+
+    Parsing re-runs xref resolution over the whole file, so callers that
+    need several operations on the same upload (e.g. cropping every
+    recipe out of a book) should construct one of these instead of going
+    through the static PDFProcessor helpers repeatedly.
+    """
+
+    def __init__(self, pdf_content: bytes):
+        self._content = pdf_content
+        self._pdf = pdfium.PdfDocument(pdf_content)
+        # Spawned lazily by crop_async; workers parse the book once in
+        # their initializer rather than re-pickling it per crop
+        self._pool: ProcessPoolExecutor | None = None
+
+    def __enter__(self) -> "PDFDocument":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        self._pdf.close()
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pdf)
+
+    def text(self, start_page: int = 0, end_page: int | None = None) -> str:
+        """Extract text for a 0-indexed page range."""
+        total_pages = len(self._pdf)
 
-class PDFProcessor:
-    @staticmethod
-    def extract_text(pdf_content: bytes, start_page: int = 0, end_page: int | None = None) -> str:
-        """Extract text from PDF content."""
-        pdf_file = io.BytesIO(pdf_content)
-        reader = PdfReader(pdf_file)
-        
-        text = ""
-        total_pages = len(reader.pages)
-        
         if end_page is None:
             end_page = total_pages
         else:
             end_page = min(end_page, total_pages)
-            
-        for page_num in range(start_page, end_page):
-            if page_num < total_pages:
-                page = reader.pages[page_num]
-                text += page.extract_text() + "\n"
-                
-        return text
 
-    @staticmethod
-    def crop_pdf(pdf_content: bytes, start_page: int, end_page: int) -> bytes:
-        """Crop PDF to specific page range."""
-        pdf_file = io.BytesIO(pdf_content)
-        reader = PdfReader(pdf_file)
-        writer = PdfWriter()
-        
-        total_pages = len(reader.pages)
-        
+        if end_page <= start_page:
+            return ""
+
+        # Page extraction is CPU-bound; fan book-sized ranges out
+        # across a process pool (each worker parses the PDF once)
+        if end_page - start_page > _PARALLEL_PAGE_THRESHOLD:
+            with ProcessPoolExecutor(
+                initializer=_init_worker, initargs=(self._content,)
+            ) as executor:
+                parts = list(executor.map(
+                    _extract_page_text, range(start_page, end_page), chunksize=8
+                ))
+            return "\n".join(parts) + "\n"
+
+        # Collect per-page text and join once; += on str is quadratic
+        # over a multi-hundred-page book
+        parts = [
+            self._pdf[page_num].get_textpage().get_text_range() or ""
+            for page_num in range(start_page, end_page)
+        ]
+        return "\n".join(parts) + "\n"
+
+    def _page_range(self, start_page: int, end_page: int) -> tuple[int, int]:
+        """Validate a 1-indexed inclusive-start range, returning 0-indexed."""
+        total_pages = len(self._pdf)
+
         # Adjust page numbers (1-indexed to 0-indexed)
         start_page = max(0, start_page - 1)
         end_page = min(total_pages, end_page)
-        
-        for page_num in range(start_page, end_page):
-            if page_num < total_pages:
-                writer.add_page(reader.pages[page_num])
-        
-        output = io.BytesIO()
-        writer.write(output)
-        output.seek(0)
-        return output.read()
+
+        # A zero-page PDF saves fine but PDFium refuses to reopen it,
+        # so reject bad ranges instead of emitting one
+        if start_page >= end_page:
+            raise ValueError(
+                f"Empty page range: {start_page + 1}..{end_page} "
+                f"of {total_pages} pages"
+            )
+        return start_page, end_page
+
+    def crop(self, start_page: int, end_page: int) -> bytes:
+        """Copy a 1-indexed inclusive-start page range into a new PDF."""
+        start_page, end_page = self._page_range(start_page, end_page)
+
+        # PDFium copies page objects natively instead of round-tripping
+        # them through a Python object model
+        dst = pdfium.PdfDocument.new()
+        try:
+            dst.import_pages(self._pdf, pages=list(range(start_page, end_page)))
+            output = io.BytesIO()
+            dst.save(output)
+            return output.getvalue()
+        finally:
+            dst.close()
+
+    async def crop_async(self, start_page: int, end_page: int) -> bytes:
+        """crop() in a worker process so the event loop never blocks.
+
+        PDFium is not thread-safe, so concurrent crops of the same
+        document go to a process pool instead of to_thread; the pool
+        also spreads a book's crops across cores.
+        """
+        start_page, end_page = self._page_range(start_page, end_page)
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                initializer=_init_worker, initargs=(self._content,)
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, _crop_pages, start_page, end_page)
+
+
+class PDFProcessor:
+    @staticmethod
+    def extract_text(pdf_content: bytes, start_page: int = 0, end_page: int | None = None) -> str:
+        """Extract text from PDF content."""
+        with PDFDocument(pdf_content) as doc:
+            return doc.text(start_page, end_page)
 
     @staticmethod
-    def read_pdf_file(file_path: str) -> bytes:
-        """Read PDF file from disk."""
+    def crop_pdf(pdf_content: bytes, start_page: int, end_page: int) -> bytes:
+        """Crop PDF to specific page range."""
+        with PDFDocument(pdf_content) as doc:
+            return doc.crop(start_page, end_page)
+
+    @staticmethod
+    async def read_pdf_file(file_path: str) -> bytes:
+        """Read PDF file from disk without blocking the event loop."""
         path = Path(file_path)
         if not path.exists():
             raise FileNotFoundError(f"PDF file not found: {file_path}")
         if not path.suffix.lower() == '.pdf':
             raise ValueError(f"File is not a PDF: {file_path}")
-            
-        with open(file_path, 'rb') as f:
-            return f.read()
+
+        # A multi-MB sync read would stall every other coroutine
+        return await asyncio.to_thread(path.read_bytes)
 
     @staticmethod
     def get_page_count(pdf_content: bytes) -> int:
         """Get total number of pages in PDF."""
-        pdf_file = io.BytesIO(pdf_content)
-        reader = PdfReader(pdf_file)
-        return len(reader.pages)
+        with PDFDocument(pdf_content) as doc:
+            return doc.page_count
 
     @staticmethod
     def extract_text_as_string(pdf_content: bytes) -> str:
         """Extract all text from PDF as a single string for LLM processing."""
         text = PDFProcessor.extract_text(pdf_content)
-        # Clean up the text for better LLM processing
-        lines = text.split('\n')
-        cleaned_lines = [line.strip() for line in lines if line.strip()]
-        return '\n'.join(cleaned_lines)
\ No newline at end of file
+        # Clean up the text for better LLM processing: one C-level
+        # regex pass instead of split/strip/join list churn
+        return _CLEAN_RE.sub('\n', text).strip()
@@ -1,14 +1,42 @@
+import asyncio
+import random
 import uuid
 from typing import Any
 
-from sqlalchemy import and_, func, select
+from sqlalchemy import and_, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.schemas.recipe import RecipeCreate, RecipeSearch
-from app.database.models import Recipe
+from app.database.base import AsyncSessionLocal
+from app.database.models import MealType, Recipe
 from app.services.llm.factory import get_llm_service
 from app.services.nutrition_service import NutritionService
-from app.services.pdf.processor import PDFProcessor
+from app.services.pdf.processor import PDFDocument
+
+# Recipes whose names match these read as breakfast regardless of calories
+BREAKFAST_KEYWORDS = ["egg", "oatmeal", "pancake", "waffle", "cereal", "toast", "smoothie", "yogurt"]
+
+
+def classify_meal_types(recipe_name: str, calories_per_serving: int) -> list[str]:
+    """Classify which meal types a recipe suits.
+
+    Runs once at ingest (migration 008 backfills existing rows with the
+    same heuristics); planning reads the stored suitable_meal_types list
+    instead of re-scanning recipe names on every call.
+    """
+    name_lower = recipe_name.lower()
+    suitable = []
+    if any(keyword in name_lower for keyword in BREAKFAST_KEYWORDS) or calories_per_serving < 600:
+        suitable.append(MealType.BREAKFAST.value)
+    if 400 <= calories_per_serving <= 800:
+        suitable.append(MealType.LUNCH.value)
+    if 500 <= calories_per_serving <= 900:
+        suitable.append(MealType.DINNER.value)
+    if calories_per_serving < 300:
+        suitable.append(MealType.SNACK.value)
+    return suitable
 
 
 class RecipeService:
@@ -42,69 +70,91 @@ class RecipeService:
             )
             recipe_data.update(nutrition_data)
         
-        # Check for duplicates
-        existing = await self.check_duplicate(
-            recipe_data["recipeName"],
-            recipe_data.get("recipeBook"),
-            recipe_data.get("recipeAuthor")
+        # Insert and duplicate-check in one statement: ON CONFLICT
+        # DO NOTHING against the coalesced identity index drops the
+        # SELECT round-trip and the check-then-insert race window
+        stmt = (
+            pg_insert(Recipe)
+            .values(
+                id=uuid.uuid4(),
+                recipe_name=recipe_data["recipeName"],
+                recipe_author=recipe_data.get("recipeAuthor"),
+                recipe_book=recipe_data.get("recipeBook"),
+                page_reference=recipe_data.get("pageReference"),
+                servings=recipe_data.get("servings", 1),
+                instructions=recipe_data["instructions"],
+                ingredients=recipe_data["ingredients"],
+                ingredients_original=recipe_data.get("ingredientsOriginal"),
+                main_protein=recipe_data["mainProtein"],
+                calories_per_serving=recipe_data["caloriesPerServing"],
+                macro_nutrients=recipe_data["macroNutrients"],
+                suitable_meal_types=classify_meal_types(
+                    recipe_data["recipeName"], recipe_data["caloriesPerServing"]
+                )
+            )
+            .on_conflict_do_nothing(
+                index_elements=[
+                    Recipe.recipe_name,
+                    text("COALESCE(recipe_book, '')"),
+                    text("COALESCE(recipe_author, '')"),
+                ]
+            )
+            .returning(Recipe)
         )
-        
-        if existing:
+
+        result = await self.db.execute(stmt)
+        recipe = result.scalar_one_or_none()
+        if recipe is None:
             raise ValueError(f"Recipe already exists: {recipe_data['recipeName']}")
-            
-        # Create recipe
-        recipe = Recipe(
-            id=uuid.uuid4(),
-            recipe_name=recipe_data["recipeName"],
-            recipe_author=recipe_data.get("recipeAuthor"),
-            recipe_book=recipe_data.get("recipeBook"),
-            page_reference=recipe_data.get("pageReference"),
-            servings=recipe_data.get("servings", 1),
-            instructions=recipe_data["instructions"],
-            ingredients=recipe_data["ingredients"],
-            ingredients_original=recipe_data.get("ingredientsOriginal"),
-            main_protein=recipe_data["mainProtein"],
-            calories_per_serving=recipe_data["caloriesPerServing"],
-            macro_nutrients=recipe_data["macroNutrients"]
-        )
-        
-        self.db.add(recipe)
+
         await self.db.commit()
-        await self.db.refresh(recipe)
-        
         return recipe
 
     async def ingest_recipe_book(self, pdf_content: bytes, book_title: str) -> list[Recipe]:
         """Ingest multiple recipes from a recipe book PDF."""
         # Get table of contents from LLM (Claude will analyze first 50 pages automatically)
         toc_data = await self.llm_service.extract_table_of_contents(pdf_content)
-        
-        recipes = []
-        for recipe_name, page_range in toc_data.items():
-            # Parse page range
-            if '-' in page_range:
-                start_page, end_page = page_range.split('-')
-                start_page = int(start_page.strip())
-                end_page = int(end_page.strip())
-            else:
-                start_page = end_page = int(page_range.strip())
-                
-            # Crop PDF to recipe pages
-            recipe_pdf = PDFProcessor.crop_pdf(pdf_content, start_page, end_page + 1)
-            
-            try:
-                # Ingest individual recipe
-                recipe = await self.ingest_single_recipe(
-                    recipe_pdf,
-                    recipe_book=book_title,
-                    page_reference=page_range
-                )
-                recipes.append(recipe)
-            except Exception as e:
-                # Log error but continue with other recipes
-                print(f"Failed to ingest {recipe_name}: {str(e)}")
-                
-        return recipes
+
+        # Overlap the per-recipe LLM round-trips instead of paying them
+        # back to back; the semaphore keeps one book from draining the
+        # DB pool or tripping API rate limits
+        semaphore = asyncio.Semaphore(settings.MAX_CONCURRENT_RECIPE_INGEST)
+
+        # Parse the book once and crop every recipe out of the same
+        # document instead of re-running xref parsing per TOC entry
+        with PDFDocument(pdf_content) as book:
+
+            async def ingest_one(recipe_name: str, page_range: str) -> Recipe | None:
+                # Parse page range
+                if '-' in page_range:
+                    start_page, end_page = page_range.split('-')
+                    start_page = int(start_page.strip())
+                    end_page = int(end_page.strip())
+                else:
+                    start_page = end_page = int(page_range.strip())
+
+                async with semaphore:
+                    try:
+                        # Crop PDF to recipe pages and ingest individually,
+                        # each task on its own session (AsyncSession is not
+                        # safe for concurrent use)
+                        recipe_pdf = await book.crop_async(start_page, end_page + 1)
+                        async with AsyncSessionLocal() as session:
+                            return await RecipeService(session).ingest_single_recipe(
+                                recipe_pdf,
+                                recipe_book=book_title,
+                                page_reference=page_range
+                            )
+                    except Exception as e:
+                        # Log error but continue with other recipes
+                        print(f"Failed to ingest {recipe_name}: {str(e)}")
+                        return None
+
+            results = await asyncio.gather(
+                *(ingest_one(name, rng) for name, rng in toc_data.items())
+            )
+
+        return [recipe for recipe in results if recipe is not None]
 
     async def check_duplicate(
         self, 
@@ -113,53 +163,70 @@ class RecipeService:
         recipe_author: str | None
     ) -> bool:
         """Check if recipe already exists."""
-        query = select(Recipe).where(
+        # SELECT 1 ... LIMIT 1 resolves as an index-only scan on the
+        # uq_recipe_identity index; no row bytes leave the database
+        query = select(1).where(
             and_(
                 Recipe.recipe_name == recipe_name,
                 Recipe.recipe_book == recipe_book,
                 Recipe.recipe_author == recipe_author
             )
-        )
+        ).limit(1)
         result = await self.db.execute(query)
-        return result.scalar_one_or_none() is not None
+        return result.first() is not None
 
     async def search_recipes(self, search_params: RecipeSearch) -> list[Recipe]:
         """Search recipes with filters."""
-        query = select(Recipe)
-        
-        # Apply filters
+        # Collect filters first so the randomized path can tell whether
+        # it is sampling the whole table or a filtered band
+        conditions = []
         if search_params.name:
-            query = query.where(Recipe.recipe_name.ilike(f"%{search_params.name}%"))
-            
+            conditions.append(Recipe.recipe_name.ilike(f"%{search_params.name}%"))
+
         if search_params.main_protein:
-            query = query.where(
+            conditions.append(
                 Recipe.main_protein.contains([search_params.main_protein])
             )
-            
+
         if search_params.calories_min is not None:
-            query = query.where(Recipe.calories_per_serving >= search_params.calories_min)
-            
+            conditions.append(Recipe.calories_per_serving >= search_params.calories_min)
+
         if search_params.calories_max is not None:
-            query = query.where(Recipe.calories_per_serving <= search_params.calories_max)
-            
+            conditions.append(Recipe.calories_per_serving <= search_params.calories_max)
+
         if search_params.protein_min is not None:
-            query = query.where(
-                Recipe.macro_nutrients["protein_g"].astext.cast(int) >= search_params.protein_min
-            )
-            
+            conditions.append(Recipe.protein_g_num >= search_params.protein_min)
+
         if search_params.protein_max is not None:
-            query = query.where(
-                Recipe.macro_nutrients["protein_g"].astext.cast(int) <= search_params.protein_max
+            conditions.append(Recipe.protein_g_num <= search_params.protein_max)
+
+        if search_params.randomize and not conditions:
+            # Unfiltered random picks: TABLESAMPLE SYSTEM_ROWS touches
+            # ~n pages instead of scanning and heapsorting the table.
+            # Sampling is page-correlated, so over-draw and shuffle.
+            sample = select(Recipe).from_statement(
+                text("SELECT * FROM recipes TABLESAMPLE SYSTEM_ROWS(:n)")
+                .bindparams(n=search_params.limit * 5)
             )
-            
+            result = await self.db.execute(sample)
+            rows = list(result.scalars().all())
+            return random.sample(rows, min(search_params.limit, len(rows)))
+
+        query = select(Recipe)
+        if conditions:
+            query = query.where(and_(*conditions))
+
         # Apply randomization if requested
         if search_params.randomize:
+            # Banded searches keep ORDER BY random(): it runs as a top-N
+            # heap over the index-filtered candidates, while TABLESAMPLE
+            # samples before WHERE and would under-fill the limit
             query = query.order_by(func.random())
         else:
             query = query.order_by(Recipe.recipe_name)
-            
+
         # Apply limit
         query = query.limit(search_params.limit)
-        
+
         result = await self.db.execute(query)
         return result.scalars().all()
\ No newline at end of file
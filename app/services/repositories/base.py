@@ -2,21 +2,73 @@
 Base repository pattern implementation for clean data access layer.
 Provides common CRUD operations and query patterns.
 """
+import asyncio
+import hashlib
 from typing import TypeVar, Generic, Type, Optional, List, Dict, Any
 from uuid import UUID
 from datetime import datetime
 from abc import ABC, abstractmethod
 
+import ormsgpack
+import redis.asyncio as redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import selectinload
 
+from app.core.config import settings
 from app.database.base import Base
 
 # Generic type for models
 ModelType = TypeVar('ModelType', bound=Base)
 
 
+class _IdLoader:
+    """
+    Coalesces id lookups issued within one event-loop tick into a single
+    SELECT ... WHERE id IN (...). Handlers that fan out over entities
+    pay one round-trip instead of one per id.
+    """
+
+    def __init__(self, db_session: AsyncSession, model: Type[ModelType]):
+        self.db = db_session
+        self.model = model
+        self._pending: Dict[UUID, asyncio.Future] = {}
+        self._flush_scheduled = False
+
+    def load(self, entity_id: UUID) -> asyncio.Future:
+        """Return a future resolving to the entity (or None)."""
+        fut = self._pending.get(entity_id)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+            fut = loop.create_future()
+            self._pending[entity_id] = fut
+            if not self._flush_scheduled:
+                # Flush after the current tick so concurrent callers
+                # land in the same batch
+                self._flush_scheduled = True
+                loop.call_soon(self._start_flush)
+        return fut
+
+    def _start_flush(self) -> None:
+        self._flush_scheduled = False
+        batch, self._pending = self._pending, {}
+        asyncio.ensure_future(self._flush(batch))
+
+    async def _flush(self, batch: Dict[UUID, asyncio.Future]) -> None:
+        try:
+            query = select(self.model).where(self.model.id.in_(list(batch)))
+            result = await self.db.execute(query)
+            found = {entity.id: entity for entity in result.scalars()}
+        except BaseException as exc:
+            for fut in batch.values():
+                if not fut.done():
+                    fut.set_exception(exc)
+            return
+        for entity_id, fut in batch.items():
+            if not fut.done():
+                fut.set_result(found.get(entity_id))
+
+
 class BaseRepository(Generic[ModelType], ABC):
     """
     Abstract base repository providing common database operations.
@@ -26,20 +78,22 @@ class BaseRepository(Generic[ModelType], ABC):
     def __init__(self, db_session: AsyncSession, model: Type[ModelType]):
         self.db = db_session
         self.model = model
-    
+        self._id_loader = _IdLoader(db_session, model)
+
     async def get_by_id(self, entity_id: UUID) -> Optional[ModelType]:
         """
         Get entity by ID.
-        
+
+        Lookups issued in the same event-loop tick are batched into one
+        query by the id loader.
+
         Args:
             entity_id: Entity UUID
-            
+
         Returns:
             Entity or None if not found
         """
-        query = select(self.model).where(self.model.id == entity_id)
-        result = await self.db.execute(query)
-        return result.scalar_one_or_none()
+        return await self._id_loader.load(entity_id)
     
     async def get_all(
         self,
@@ -101,12 +155,11 @@ class BaseRepository(Generic[ModelType], ABC):
             List of created entities
         """
         self.db.add_all(entities)
+        # insertmanyvalues folds these into one INSERT .. RETURNING, and
+        # expire_on_commit=False keeps attributes live after commit, so
+        # the old per-entity refresh loop (one SELECT per row) was pure
+        # round-trip waste
         await self.db.commit()
-        
-        # Refresh all entities
-        for entity in entities:
-            await self.db.refresh(entity)
-        
         return entities
     
     async def update(self, entity_id: UUID, updates: Dict[str, Any]) -> Optional[ModelType]:
@@ -165,10 +218,11 @@ class BaseRepository(Generic[ModelType], ABC):
         Returns:
             True if exists, False otherwise
         """
-        query = select(func.count()).where(self.model.id == entity_id)
+        # SELECT 1 ... LIMIT 1 stops at the first index hit; COUNT(*)
+        # adds an aggregate node and scans every match
+        query = select(1).where(self.model.id == entity_id).limit(1)
         result = await self.db.execute(query)
-        count = result.scalar()
-        return count > 0
+        return result.first() is not None
     
     async def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
         """
@@ -197,10 +251,20 @@ class BaseRepository(Generic[ModelType], ABC):
 
 class CacheableRepository(BaseRepository[ModelType]):
     """
-    Repository with caching capabilities for frequently accessed data.
-    Implements simple in-memory caching with TTL.
+    Repository with Redis-backed caching for frequently accessed data.
+    Entries survive across requests and workers; a per-instance dict
+    would start cold on every request since FastAPI constructs a fresh
+    repository per handler.
     """
-    
+
+    # One client shared by all repository instances in the process
+    _redis: Optional[redis.Redis] = None
+
+    # In-flight fetches by cache key; class-level because repositories
+    # are constructed per request, so an instance dict would never see
+    # two concurrent callers
+    _inflight: Dict[str, asyncio.Future] = {}
+
     def __init__(
         self,
         db_session: AsyncSession,
@@ -208,21 +272,40 @@ class CacheableRepository(BaseRepository[ModelType]):
         cache_ttl_seconds: int = 300
     ):
         super().__init__(db_session, model)
-        self.cache: Dict[str, Tuple[Any, datetime]] = {}
         self.cache_ttl_seconds = cache_ttl_seconds
-    
+
+    @classmethod
+    def _get_redis(cls) -> redis.Redis:
+        if cls._redis is None:
+            cls._redis = redis.from_url(settings.REDIS_URL)
+        return cls._redis
+
     def _cache_key(self, method: str, *args, **kwargs) -> str:
-        """Generate cache key from method and arguments"""
-        key_parts = [method]
-        key_parts.extend(str(arg) for arg in args)
-        key_parts.extend(f"{k}:{v}" for k, v in sorted(kwargs.items()))
-        return ":".join(key_parts)
-    
-    def _is_cache_valid(self, cached_at: datetime) -> bool:
-        """Check if cached data is still valid"""
-        age = (datetime.utcnow() - cached_at).total_seconds()
-        return age < self.cache_ttl_seconds
-    
+        """Generate a stable hashed cache key from method and arguments"""
+        digest = hashlib.blake2b(
+            repr((method, args, sorted(kwargs.items()))).encode(),
+            digest_size=16
+        ).hexdigest()
+        return f"cheflink:repo:{self.model.__tablename__}:{digest}"
+
+    def _pack(self, data: Any) -> bytes:
+        """Serialize a cached value; model rows become column dicts"""
+        if isinstance(data, list) and data and isinstance(data[0], self.model):
+            rows = [
+                {c.name: getattr(obj, c.name) for c in self.model.__table__.columns}
+                for obj in data
+            ]
+            return ormsgpack.packb({"model_rows": rows})
+        return ormsgpack.packb({"value": data})
+
+    def _unpack(self, raw: bytes) -> Any:
+        payload = ormsgpack.unpackb(raw)
+        if "model_rows" in payload:
+            # Detached, read-only instances; ids/timestamps revive as
+            # strings, which the Pydantic response models coerce back
+            return [self.model(**row) for row in payload["model_rows"]]
+        return payload["value"]
+
     async def get_cached(
         self,
         cache_key: str,
@@ -232,42 +315,72 @@ class CacheableRepository(BaseRepository[ModelType]):
     ) -> Any:
         """
         Get data from cache or fetch if not cached.
-        
+
         Args:
             cache_key: Cache key
             fetch_func: Function to fetch data if not cached
             *args, **kwargs: Arguments for fetch function
-            
+
         Returns:
             Cached or fetched data
         """
-        # Check cache
-        if cache_key in self.cache:
-            data, cached_at = self.cache[cache_key]
-            if self._is_cache_valid(cached_at):
-                return data
-        
+        # Check cache; an unreachable Redis degrades to a plain fetch
+        try:
+            raw = await self._get_redis().get(cache_key)
+        except redis.RedisError:
+            return await self._fetch_single_flight(cache_key, fetch_func, *args, **kwargs)
+
+        if raw is not None:
+            return self._unpack(raw)
+
         # Fetch fresh data
-        data = await fetch_func(*args, **kwargs)
-        
+        data = await self._fetch_single_flight(cache_key, fetch_func, *args, **kwargs)
+
         # Update cache
-        self.cache[cache_key] = (data, datetime.utcnow())
-        
+        try:
+            await self._get_redis().set(
+                cache_key, self._pack(data), ex=self.cache_ttl_seconds
+            )
+        except (redis.RedisError, TypeError):
+            # Unserializable or Redis down: serve uncached
+            pass
+
         return data
-    
-    def invalidate_cache(self, pattern: Optional[str] = None) -> None:
-        """
-        Invalidate cache entries.
-        
-        Args:
-            pattern: Optional pattern to match cache keys
+
+    @classmethod
+    async def _fetch_single_flight(cls, cache_key: str, fetch_func, *args, **kwargs) -> Any:
+        """Run the fetch once per key; concurrent misses await its result.
+
+        When a hot entry expires, every in-flight request misses at the
+        same time; without this each would run the same SQL in parallel.
         """
-        if pattern:
-            keys_to_remove = [
-                key for key in self.cache.keys()
-                if pattern in key
-            ]
-            for key in keys_to_remove:
-                del self.cache[key]
+        pending = cls._inflight.get(cache_key)
+        if pending is not None:
+            return await pending
+
+        fut = asyncio.get_running_loop().create_future()
+        cls._inflight[cache_key] = fut
+        try:
+            data = await fetch_func(*args, **kwargs)
+        except BaseException as exc:
+            fut.set_exception(exc)
+            # Mark retrieved so a waiterless failure doesn't log a
+            # "never retrieved" warning at GC
+            fut.exception()
+            raise
         else:
-            self.cache.clear()
\ No newline at end of file
+            fut.set_result(data)
+            return data
+        finally:
+            del cls._inflight[cache_key]
+
+    async def invalidate_cache(self) -> None:
+        """Drop every cached entry for this repository's model."""
+        prefix = f"cheflink:repo:{self.model.__tablename__}:"
+        try:
+            r = self._get_redis()
+            keys = [key async for key in r.scan_iter(match=prefix + "*")]
+            if keys:
+                await r.delete(*keys)
+        except redis.RedisError:
+            pass
\ No newline at end of file
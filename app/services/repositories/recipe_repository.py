@@ -8,7 +8,7 @@ from datetime import datetime
 
 from sqlalchemy import select, func, and_, or_, cast, String
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import load_only, selectinload
 from sqlalchemy.dialects.postgresql import JSONB
 
 from app.database.models import Recipe
@@ -50,10 +50,22 @@ class RecipeRepository(CacheableRepository[Recipe]):
             offset: Number of results to skip
             
         Returns:
-            List of matching recipes
+            List of matching recipes (list-view columns only; the heavy
+            instructions/ingredients JSON stays deferred)
         """
-        # Build base query
-        stmt = select(Recipe)
+        # Build base query; callers render list rows, so skip the JSON
+        # blobs that dominate row width
+        stmt = select(Recipe).options(
+            load_only(
+                Recipe.id,
+                Recipe.recipe_name,
+                Recipe.recipe_author,
+                Recipe.recipe_book,
+                Recipe.calories_per_serving,
+                Recipe.main_protein,
+                Recipe.macro_nutrients,
+            )
+        )
         conditions = []
         
         # Text search on name and ingredients
@@ -79,17 +91,12 @@ class RecipeRepository(CacheableRepository[Recipe]):
         if max_calories is not None:
             conditions.append(Recipe.calories_per_serving <= max_calories)
         
-        # Nutrition filters
+        # Nutrition filters: generated columns keep these sargable
         if min_protein is not None:
-            # Access JSON field for protein
-            conditions.append(
-                Recipe.macro_nutrients['protein_g'].astext.cast(Float) >= min_protein
-            )
-        
+            conditions.append(Recipe.protein_g_num >= min_protein)
+
         if max_fat is not None:
-            conditions.append(
-                Recipe.macro_nutrients['fat_g'].astext.cast(Float) <= max_fat
-            )
+            conditions.append(Recipe.fat_g_num <= max_fat)
         
         # Recipe book filter
         if recipe_book:
@@ -217,12 +224,8 @@ class RecipeRepository(CacheableRepository[Recipe]):
         async def fetch():
             stmt = (
                 select(Recipe)
-                .where(
-                    Recipe.macro_nutrients['protein_g'].astext.cast(Float) >= min_protein
-                )
-                .order_by(
-                    Recipe.macro_nutrients['protein_g'].astext.cast(Float).desc()
-                )
+                .where(Recipe.protein_g_num >= min_protein)
+                .order_by(Recipe.protein_g_num.desc())
                 .limit(limit)
             )
             
@@ -112,6 +112,9 @@ class ChefLinkBot:
                 # Use the unified handler for all family members
                 handler = self.family_handler(db)
                 await handler.handle_message(update, context, user)
+                # Single commit per turn: tool executors flush into this
+                # session but leave the transaction boundary to us
+                await db.commit()
             else:
                 await update.message.reply_text(
                     "As a chef, please use specific commands:\n"
@@ -178,6 +181,9 @@ class ChefLinkBot:
                 update.message.text = "Show me my meal plan for today"
                 handler = self.family_handler(db)
                 await handler.handle_message(update, context, user)
+                # Same per-turn commit as handle_message: tool executors
+                # flush into this session but don't own the transaction
+                await db.commit()
             else:
                 await update.message.reply_text("This command is only for family members.")
     
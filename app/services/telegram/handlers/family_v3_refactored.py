@@ -18,8 +18,9 @@ from app.database.models import User, Recipe
 from app.services.llm.factory import get_llm_service
 from app.services.telegram.utils import telegram_safe_markdown
 from app.core.tools.registry import get_tool_registry, ToolCategory
-from app.core.tools.executor import ToolExecutor
+from app.core.tools.executor import ToolExecutor, dumps_result
 from app.core.conversation.manager import ConversationContext
+from app.core.conversation.redis_store import RedisConversationStore
 from app.core.config import settings
 from app.core.feature_flags import FeatureFlags
 
@@ -119,16 +120,42 @@ class ResponseProcessor:
         # Handle string response
         elif isinstance(response, str):
             return response
-        
+
         return ""
 
+    @classmethod
+    def extract_usage(cls, response: Any) -> Dict[str, Any]:
+        """
+        Extract the token-usage block from an LLM response.
+
+        Args:
+            response: LLM response object
+
+        Returns:
+            Usage dictionary (empty if the provider reported none)
+        """
+        usage = getattr(response, 'usage', None)
+        if usage is None:
+            return {}
+        if isinstance(usage, dict):
+            return usage
+        return {
+            "input_tokens": getattr(usage, "input_tokens", None),
+            "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        }
+
 
 class FamilyHandlerV3:
     """
     Unified family handler with clean architecture and no duplication.
     Supports both direct and agentic response modes.
     """
-    
+
+    # Shared across handler instances: the handler is constructed per
+    # message, so conversation state must live outside it (and outside
+    # the process, so any worker can serve any user)
+    _conversation_store: Optional[RedisConversationStore] = None
+
     def __init__(self, db_session: AsyncSession):
         self.db = db_session
         self.llm_service = get_llm_service()
@@ -142,10 +169,13 @@ class FamilyHandlerV3:
             if self.feature_flags.is_enabled("AGENTIC_WORKFLOW")
             else ResponseMode.DIRECT
         )
-        
-        # Conversation contexts per user
-        self.conversations: Dict[str, ConversationContext] = {}
-    
+
+    @classmethod
+    def _get_conversation_store(cls) -> RedisConversationStore:
+        if cls._conversation_store is None:
+            cls._conversation_store = RedisConversationStore()
+        return cls._conversation_store
+
     async def handle_message(
         self,
         update: Update,
@@ -162,37 +192,35 @@ class FamilyHandlerV3:
         """
         try:
             message = update.message.text
-            
+
             # Get or create conversation context
-            conversation = self._get_conversation_context(user)
-            
+            conversation = await self._get_conversation_context(user)
+
             # Add user message
             conversation.add_message("user", message)
-            
+
             # Process based on response mode
             if self.response_mode == ResponseMode.AGENTIC:
                 await self._handle_agentic_response(update, context, user, conversation)
             else:
                 await self._handle_direct_response(update, context, user, conversation)
-                
+
+            # Persist the turn so the next handler instance sees it
+            await self._get_conversation_store().save(str(user.id), conversation)
+
         except Exception as e:
             logger.error(f"Error handling message for user {user.id}: {str(e)}")
             await update.message.reply_text(
                 "I encountered an error processing your request. Please try again."
             )
     
-    def _get_conversation_context(self, user: User) -> ConversationContext:
-        """Get or create conversation context for user"""
-        user_id = str(user.id)
-        
-        if user_id not in self.conversations:
-            system_prompt = self._build_system_prompt(user)
-            self.conversations[user_id] = ConversationContext(
-                max_tokens=8000,
-                system_prompt=system_prompt
-            )
-        
-        return self.conversations[user_id]
+    async def _get_conversation_context(self, user: User) -> ConversationContext:
+        """Load the user's conversation from the shared store (or create one)"""
+        return await self._get_conversation_store().get_or_create_context(
+            str(user.id),
+            system_prompt=self._build_system_prompt(user),
+            max_tokens=8000
+        )
     
     def _build_system_prompt(self, user: User) -> str:
         """
@@ -294,9 +322,14 @@ Provide helpful, personalized meal planning advice based on the user's preferenc
                 temperature=0.7
             )
             
+            # Adopt the provider-reported prompt size over local estimates
+            conversation.update_from_llm_response(
+                self.response_processor.extract_usage(response)
+            )
+
             # Extract response content
             response_text = self.response_processor.extract_text_content(response)
-            
+
             # Check for final message
             final_message = self.response_processor.extract_final_message(response_text)
             if final_message:
@@ -323,7 +356,7 @@ Provide helpful, personalized meal planning advice based on the user's preferenc
                     # Add tool result to conversation
                     conversation.add_message(
                         "tool",
-                        json.dumps(result),
+                        dumps_result(result),
                         metadata={"tool_id": tool_call['id']}
                     )
             else:
@@ -359,6 +392,11 @@ Provide helpful, personalized meal planning advice based on the user's preferenc
         conversation: ConversationContext
     ) -> None:
         """Process a single LLM response with potential tool calls."""
+        # Adopt the provider-reported prompt size over local estimates
+        conversation.update_from_llm_response(
+            self.response_processor.extract_usage(response)
+        )
+
         # Extract content
         response_text = self.response_processor.extract_text_content(response)
         tool_calls = self.response_processor.extract_tool_calls(response)
@@ -373,7 +411,7 @@ Provide helpful, personalized meal planning advice based on the user's preferenc
                 )
                 tool_results.append({
                     "tool_use_id": tool_call['id'],
-                    "content": json.dumps(result)
+                    "content": dumps_result(result)
                 })
         
         # If we have tool results, call LLM again with results
@@ -399,7 +437,10 @@ Provide helpful, personalized meal planning advice based on the user's preferenc
                 messages=messages,
                 temperature=0.7
             )
-            
+            conversation.update_from_llm_response(
+                self.response_processor.extract_usage(final_response)
+            )
+
             response_text = self.response_processor.extract_text_content(final_response)
         
         # Send response to user
@@ -43,7 +43,7 @@ async def _ingest_recipe(pdf_path: Path, is_book: bool, book_title: str | None):
 
     try:
         # Read PDF content
-        pdf_content = PDFProcessor.read_pdf_file(str(pdf_path))
+        pdf_content = await PDFProcessor.read_pdf_file(str(pdf_path))
         
         async for db in get_db():
             recipe_service = RecipeService(db)
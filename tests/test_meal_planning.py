@@ -1,4 +1,5 @@
 import uuid
+from collections import deque
 from datetime import date, timedelta
 from unittest.mock import AsyncMock, patch
 
@@ -28,9 +29,15 @@ async def test_create_meal_plan(db_session, sample_user, sample_recipe):
         }
     }
     
+    candidate_pools = {
+        meal_type: deque([sample_recipe])
+        for meal_type in mock_structure["daily_meals"]
+    }
+
     with patch.object(agent, '_create_plan_structure', return_value=mock_structure):
-        with patch.object(agent, '_find_recipe_for_slot', return_value=sample_recipe):
-            
+        with patch.object(agent, '_fetch_candidate_pools', return_value=candidate_pools), \
+             patch.object(agent, '_pick_recipe_for_slot', return_value=sample_recipe):
+
             dietary_goals = {"calories": 1800, "protein": 90}
             eating_habits = {"meals_per_day": 3}
             
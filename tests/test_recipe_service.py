@@ -80,24 +80,49 @@ async def test_ingest_single_recipe(db_session, mock_llm_response):
 async def test_ingest_recipe_book(db_session, mock_llm_response):
     """Test recipe book ingestion."""
     recipe_service = RecipeService(db_session)
-    
+
     # Mock TOC extraction
     mock_toc = {
         "Recipe 1": "10-12",
         "Recipe 2": "15"
     }
-    
+
+    # The ingest path parses the book once (PDFDocument) and crops each
+    # recipe via crop_async, then ingests the crop on its own session
+    mock_book = MagicMock()
+    mock_book.__enter__.return_value = mock_book
+    mock_book.crop_async = AsyncMock(return_value=b"cropped pdf")
+
+    async def fake_ingest(self, pdf_content, recipe_book=None, page_reference=None):
+        assert pdf_content == b"cropped pdf"
+        return Recipe(
+            id=uuid.uuid4(),
+            recipe_name=mock_llm_response["recipeName"],
+            recipe_book=recipe_book,
+            page_reference=page_reference,
+            servings=mock_llm_response["servings"],
+            instructions=mock_llm_response["instructions"],
+            ingredients=mock_llm_response["ingredients"],
+            main_protein=mock_llm_response["mainProtein"],
+            calories_per_serving=mock_llm_response["caloriesPerServing"],
+            macro_nutrients=mock_llm_response["macroNutrients"]
+        )
+
     with patch.object(recipe_service.llm_service, 'extract_table_of_contents',
                      return_value=mock_toc):
-        with patch.object(recipe_service.llm_service, 'extract_recipe',
-                         return_value=mock_llm_response):
-            with patch('app.services.pdf.processor.PDFProcessor.crop_pdf',
-                      return_value=b"cropped pdf"):
-                
+        with patch('app.services.recipe_service.PDFDocument',
+                  return_value=mock_book):
+            with patch.object(RecipeService, 'ingest_single_recipe',
+                             autospec=True, side_effect=fake_ingest):
+
                 pdf_content = b"mock recipe book pdf"
                 recipes = await recipe_service.ingest_recipe_book(
                     pdf_content, "Test Book"
                 )
-                
+
                 assert len(recipes) == 2
-                assert all(r.recipe_book == "Test Book" for r in recipes)
\ No newline at end of file
+                assert all(r.recipe_book == "Test Book" for r in recipes)
+
+                # 1-indexed inclusive ranges: "10-12" -> (10, 13), "15" -> (15, 16)
+                crops = sorted(call.args for call in mock_book.crop_async.await_args_list)
+                assert crops == [(10, 13), (15, 16)]
\ No newline at end of file